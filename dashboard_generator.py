@@ -1,9 +1,15 @@
 import json
 import os
+import base64
+import gzip
+import hashlib
+import pickle
 from pathlib import Path
+import orjson
 import pandas as pd
 from datetime import datetime, timedelta
 import sqlite3
+from contextlib import closing
 import numpy as np
 
 # Province mapping from abbreviations to full names
@@ -16,16 +22,6 @@ PROVINCE_MAPPING = {
     'ST': 'Stung Treng', 'MK': 'Mondulkiri', 'RK': 'Ratanakiri', 'PP': 'Phnom Penh', 'TK': 'Takeo'
 }
 
-def get_province_full_name(abbreviation):
-    """Convert province abbreviation to full name"""
-    return PROVINCE_MAPPING.get(abbreviation.upper(), abbreviation)
-
-def extract_province_from_site_id(site_id):
-    """Extract province abbreviation from site ID (first 2 letters)"""
-    if isinstance(site_id, str) and len(site_id) >= 2:
-        return site_id[:2].upper()
-    return 'Unknown'
-
 def generate_installed_sites_dashboard():
     """Generate an HTML dashboard with actual data from installed_sites_production.xlsx"""
     
@@ -53,7 +49,12 @@ def generate_installed_sites_dashboard():
     print(f"\n[1/4] Loading data from {excel_file.name}...")
     
     try:
-        df = pd.read_excel(excel_file, sheet_name='Installed Sites Production')
+        # Prefer the parquet copy written alongside the workbook, when it is at least as new
+        parquet_file = excel_file.with_suffix('.parquet')
+        if parquet_file.exists() and parquet_file.stat().st_mtime >= excel_file.stat().st_mtime:
+            df = pd.read_parquet(parquet_file)
+        else:
+            df = pd.read_excel(excel_file, sheet_name='Installed Sites Production')
         print(f"✓ Data loaded successfully: {len(df)} sites")
     except Exception as e:
         print(f"✗ Error loading Excel: {e}")
@@ -66,14 +67,12 @@ def generate_installed_sites_dashboard():
         # Use current directory
         project_folder = Path(__file__).parent.resolve()
         db_path = project_folder / "solar_performance.db"
-        conn = sqlite3.connect(db_path)
         
-        # Get site mapping with additional info
-        site_query = "SELECT site_id, site_name, commissioned_date FROM sites"
-        site_df_db = pd.read_sql_query(site_query, conn)
-        site_name_map = dict(zip(site_df_db['site_id'], site_df_db['site_name']))
-        site_commissioned_map = dict(zip(site_df_db['site_id'], site_df_db['commissioned_date']))
-        conn.close()
+        # Get site mapping with additional info (closing() releases the handle even if the query fails)
+        with closing(sqlite3.connect(db_path)) as conn:
+            rows = conn.execute("SELECT site_id, site_name, commissioned_date FROM sites").fetchall()
+        site_name_map = {site_id: site_name for site_id, site_name, _ in rows}
+        site_commissioned_map = {site_id: commissioned_date for site_id, _, commissioned_date in rows}
         print("✓ Additional site information loaded from database")
     except Exception as e:
         print(f"⚠ Warning: Could not load additional site info from database: {e}")
@@ -83,164 +82,217 @@ def generate_installed_sites_dashboard():
     print(f"\n[3/4] Processing data...")
     
     # Extract province from Site_ID
-    df['Province'] = df['Site_ID'].apply(extract_province_from_site_id)
-    df['Province_Full'] = df['Province'].apply(get_province_full_name)
+    # Province abbreviation is the first 2 letters of the site ID, mapped to its full name when known
+    # Non-string IDs (numeric Site_ID columns from Excel or parquet) fall back to 'Unknown'
+    site_ids = df['Site_ID'].astype(str).where(df['Site_ID'].map(type).eq(str), '')
+    has_prefix = site_ids.str.len() >= 2
+    df['Province'] = site_ids.str[:2].str.upper().where(has_prefix, 'Unknown')
+    df['Province_Full'] = df['Province'].map(PROVINCE_MAPPING).fillna(df['Province'])
+    
+    # Display name: the database name, else the sheet's Site label, else the Site_ID itself
+    site_labels = df['Site'].astype(str).where(df['Site'].notna())
+    df['Site_Display_Name'] = df['Site_ID'].map(site_name_map).fillna(site_labels).fillna(df['Site_ID'])
     
     # Get date columns
     date_cols = [col for col in df.columns if isinstance(col, str) and len(col) == 10 and col[4] == '-' and col[7] == '-']
     date_cols_sorted = sorted(date_cols, reverse=True)
     
-    # Calculate degradation analysis
-    print(f"\n  Calculating degradation metrics...")
-    degradation_data = []
+    # Readings for the 3 most recent dates, shared by the degradation flags and the critical alerts
+    last_3_days = date_cols_sorted[:3] if len(date_cols_sorted) >= 3 else date_cols_sorted
+    recent_production = df[last_3_days].to_numpy(dtype=np.float64, na_value=np.nan)
     
-    print(f"  Processing {len(df)} sites for degradation analysis...")
-    for idx, row in df.iterrows():
-        site_id = row['Site_ID']
+    # Reuse the per-site analysis when the inputs (and this script) are unchanged
+    cache_dir = scripts_folder / ".cache"
+    fingerprint = hashlib.sha256(
+        pd.util.hash_pandas_object(df, index=True).values.tobytes()
+        + json.dumps([[str(c) for c in df.columns], site_name_map, site_commissioned_map], sort_keys=True, default=str).encode('utf-8')
+        + Path(__file__).read_bytes()
+    ).hexdigest()
+    cache_file = cache_dir / f"analysis.{fingerprint}.pkl"
+    cached = None
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = pickle.load(f)
+            print(f"  ✓ Reusing cached analysis ({fingerprint[:12]})")
+        except Exception as e:
+            print(f"  ⚠ Warning: Could not read analysis cache: {e}")
     
-        # Show progress every 100 sites
-        if (idx + 1) % 100 == 0:
-            print(f"    Progress: {idx + 1}/{len(df)} sites processed...")
-        array_size = row['Array_Size_kWp']
-        
-        if pd.isna(array_size) or array_size == 0:
-            continue
+    if cached is None:
+        # Calculate degradation analysis
+        print(f"\n  Calculating degradation metrics...")
+        degradation_data = []
+    
+        print(f"  Processing {len(df)} sites for degradation analysis...")
+        # One sites x dates matrix shared by the degradation windows and the chart series
+        production = df[date_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        if date_cols:
+            # Each window is a boolean mask over the production matrix
+            col_dates = pd.to_datetime(pd.Index(date_cols)).values
+            array_sizes = pd.to_numeric(df['Array_Size_kWp'], errors='coerce').to_numpy(dtype=np.float64)
+            first_dates = pd.to_datetime(df['First_Production_Date'])
             
-        # Get first production date (commissioning month)
-        first_date = row['First_Production_Date']
-        if pd.isna(first_date):
-            continue
+            # Commissioning month and the month up to the latest date
+            latest_date = pd.to_datetime(date_cols[-1])
+            comm_start = first_dates.values[:, None]
+            comm_end = (first_dates + pd.DateOffset(months=1)).values[:, None]
+            comm_mask = (col_dates >= comm_start) & (col_dates < comm_end)
+            last_mask = (col_dates >= (latest_date - pd.DateOffset(months=1)).to_datetime64()) & (col_dates <= latest_date.to_datetime64())
             
-        first_date = pd.to_datetime(first_date)
-        
-        # Get data from commissioning month
-        commissioning_month_start = first_date
-        commissioning_month_end = (first_date + pd.DateOffset(months=1))
-        
-        # Get data from last month
-        latest_date = pd.to_datetime(date_cols[-1]) if date_cols else None
-        if latest_date is None:
-            continue
+            # 95th percentile of the positive readings in each window
+            positive = production > 0
+            comm_vals = np.where(comm_mask & positive, production, np.nan)
+            last_vals = np.where(last_mask[None, :] & positive, production, np.nan)
+            valid = (
+                ~np.isnan(array_sizes) & (array_sizes != 0) & first_dates.notna().to_numpy()
+                & ~np.isnan(comm_vals).all(axis=1) & ~np.isnan(last_vals).all(axis=1)
+            )
+            initial_95th = np.nanpercentile(comm_vals[valid], 95, axis=1) / array_sizes[valid]
+            latest_95th = np.nanpercentile(last_vals[valid], 95, axis=1) / array_sizes[valid]
             
-        last_month_start = latest_date - pd.DateOffset(months=1)
-        last_month_end = latest_date
-        
-        # Filter date columns for each period
-        commissioning_cols = [col for col in date_cols
-                             if commissioning_month_start <= pd.to_datetime(col) < commissioning_month_end]
-        last_month_cols = [col for col in date_cols
-                          if last_month_start <= pd.to_datetime(col) <= last_month_end]
-        
-        # Calculate 95th percentile for each period
-        if commissioning_cols and last_month_cols:
-            commissioning_values = [row[col] for col in commissioning_cols if pd.notna(row[col]) and row[col] > 0]
-            last_month_values = [row[col] for col in last_month_cols if pd.notna(row[col]) and row[col] > 0]
+            # Expected degradation: 3% in year one, 0.7%/year after
+            years_elapsed = (latest_date - first_dates[valid]).dt.days.to_numpy() / 365.25
+            expected_degradation = np.where(years_elapsed <= 1, years_elapsed * 3, 3 + (years_elapsed - 1) * 0.7)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                actual_degradation = np.where(initial_95th > 0, (initial_95th - latest_95th) / initial_95th * 100, 0)
+            performance_vs_expected = expected_degradation - actual_degradation
+            
+            # Check if site has data in last 3 days
+            has_recent_data = (recent_production > 0).any(axis=1)[valid]
             
-            if commissioning_values and last_month_values:
-                initial_95th = np.percentile(commissioning_values, 95) / array_size
-                latest_95th = np.percentile(last_month_values, 95) / array_size
-                
-                # Calculate years elapsed
-                years_elapsed = (latest_date - first_date).days / 365.25
-                
-                # Calculate expected degradation
-                if years_elapsed <= 1:
-                    expected_degradation = years_elapsed * 3
-                else:
-                    expected_degradation = 3 + (years_elapsed - 1) * 0.7
-                
-                # Calculate actual degradation
-                actual_degradation = ((initial_95th - latest_95th) / initial_95th * 100) if initial_95th > 0 else 0
-                
-                # Calculate performance vs expected
-                performance_vs_expected = expected_degradation - actual_degradation
-                
-                # Check if site has data in last 3 days
-                last_3_days = date_cols_sorted[:3] if len(date_cols_sorted) >= 3 else date_cols_sorted
-                has_recent_data = any(pd.notna(row[date]) and row[date] > 0 for date in last_3_days)
-                
+            valid_df = df[valid]
+            for i, (site_id, site_name, panel_description, province, first_date, array_size) in enumerate(zip(
+                    valid_df['Site_ID'], valid_df['Site_Display_Name'], valid_df['Panel_Description'],
+                    valid_df['Province_Full'], first_dates[valid], array_sizes[valid])):
                 degradation_data.append({
                     'site_id': site_id,
-                    'site_name': site_name_map.get(site_id, str(row['Site']) if pd.notna(row['Site']) else site_id),
-                    'array_size': array_size,
-                    'panel_description': str(row['Panel_Description']) if pd.notna(row['Panel_Description']) else 'N/A',
-                    'province': row['Province_Full'],
-                    'initial_yield_95th': initial_95th,
-                    'latest_yield_95th': latest_95th,
-                    'years_elapsed': years_elapsed,
-                    'expected_degradation': expected_degradation,
-                    'actual_degradation': actual_degradation,
-                    'performance_vs_expected': performance_vs_expected,
-                    'has_recent_data': has_recent_data,
-                    'commissioned_date': first_date.strftime('%Y-%m-%d')
+                    'site_name': site_name,
+                    'array_size': float(array_size),
+                    'panel_description': str(panel_description) if pd.notna(panel_description) else 'N/A',
+                    'province': province,
+                    'initial_yield_95th': float(initial_95th[i]),
+                    'latest_yield_95th': float(latest_95th[i]),
+                    'years_elapsed': float(years_elapsed[i]),
+                    'expected_degradation': float(expected_degradation[i]),
+                    'actual_degradation': float(actual_degradation[i]),
+                    'performance_vs_expected': float(performance_vs_expected[i]),
+                    'has_recent_data': bool(has_recent_data[i]),
+                    'commissioned_date': first_date.strftime('%Y-%m-%d'),
+                    # Display strings formatted once here instead of on every render
+                    'actual_degradation_str': f"{actual_degradation[i]:.1f}% degradation" if actual_degradation[i] >= 0 else f"{abs(actual_degradation[i]):.1f}% improvement",
+                    'expected_degradation_str': f"Expected: {expected_degradation[i]:.1f}%",
+                    'performance_vs_expected_str': f"{performance_vs_expected[i]:.1f}% better than expected" if performance_vs_expected[i] >= 0 else f"{abs(performance_vs_expected[i]):.1f}% worse than expected",
+                    'array_size_str': f"{array_size:.1f} kWp",
+                    'years_elapsed_str': f"{years_elapsed[i]:.1f} years old",
+                    'yield_95th_str': f"Initial: {initial_95th[i]:.2f} kWh/kWp → Latest: {latest_95th[i]:.2f} kWh/kWp"
                 })
     
-    degradation_df = pd.DataFrame(degradation_data)
-    print(f"  ✓ Degradation analysis complete for {len(degradation_df)} sites")
+        # Prepare site data for JavaScript
+        site_data = {}
     
-    # Prepare site data for JavaScript
-    site_data = {}
-    
-    for idx, row in df.iterrows():
-        site_id = row['Site_ID']
+        # Pull each column out once so the loop below runs per site, not per cell
+        def text_values(col, default='N/A'):
+            return [str(v) if pd.notna(v) else default for v in df[col]]
         
-        # Extract daily data
-        daily_data = []
-        for date_col in date_cols:
-            if pd.notna(row[date_col]):
-                daily_data.append({
-                    'date': date_col,
-                    'solar_supply_kwh': float(row[date_col]),
-                    'specific_yield': float(row[date_col]) / float(row['Array_Size_kWp']) if pd.notna(row['Array_Size_kWp']) and row['Array_Size_kWp'] > 0 else 0
-                })
+        def numeric_values(col):
+            return pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy()
+        
+        site_ids = df['Site_ID'].tolist()
+        sizes = pd.to_numeric(df['Array_Size_kWp'], errors='coerce').to_numpy(dtype=np.float64)
+        date_labels = np.array(date_cols, dtype=object)
+        site_names = df['Site_Display_Name'].tolist()
+        pos = text_values('PO')
+        projects = text_values('Project')
+        grid_access = text_values('Grid Access')
+        power_sources = text_values('Power Sources')
+        panel_models = text_values('Panel Model')
+        panel_vendors = text_values('Panel Vendor')
+        panel_descriptions = text_values('Panel_Description')
+        first_production = text_values('First_Production_Date')
+        commissioned_dates = df['Site_ID'].map(site_commissioned_map).fillna(pd.Series(first_production, index=df.index)).tolist()
+        provinces = df['Province_Full'].tolist()
+        panels = numeric_values('Panels').astype(np.int64).tolist()
+        panel_sizes = numeric_values('Panel Size').astype(np.int64).tolist()
+        array_sizes_kwp = numeric_values('Array_Size_kWp').tolist()
+        avg_loads = numeric_values('Avg Load').tolist()
         
-        # Helper function to safely convert to int
-        def safe_int(value):
-            try:
-                return int(pd.to_numeric(value, errors='coerce')) if pd.notna(value) else 0
-            except:
-                return 0
+        # Specific yield and the Float32 packing for every (site, date) cell in one pass
+        present = ~np.isnan(production)
+        positive_size = (sizes > 0)[:, None]
+        supply_matrix = production.astype(np.float32)
+        yield_matrix = np.divide(production, sizes[:, None], out=np.zeros_like(production), where=positive_size).astype(np.float32)
         
-        # Helper function to safely convert to float
-        def safe_float(value):
-            try:
-                return float(pd.to_numeric(value, errors='coerce')) if pd.notna(value) else 0
-            except:
-                return 0
+        for i, site_id in enumerate(site_ids):
+            # Extract daily data as dates + packed Float32 columns (decoded once in the browser)
+            has_value = present[i]
+            daily_data = {
+                'dates': date_labels[has_value].tolist(),
+                'solar_supply_kwh': base64.b64encode(supply_matrix[i, has_value].tobytes()).decode('ascii'),
+                'specific_yield': base64.b64encode(yield_matrix[i, has_value].tobytes()).decode('ascii')
+            }
         
-        site_data[site_id] = {
-            'site_id': site_id,
-            'site_name': site_name_map.get(site_id, str(row['Site']) if pd.notna(row['Site']) else site_id),
-            'split': str(row['Split']) if pd.notna(row['Split']) else site_id,
-            'po': str(row['PO']) if pd.notna(row['PO']) else 'N/A',
-            'project': str(row['Project']) if pd.notna(row['Project']) else 'N/A',
-            'grid_access': str(row['Grid Access']) if pd.notna(row['Grid Access']) else 'N/A',
-            'power_sources': str(row['Power Sources']) if pd.notna(row['Power Sources']) else 'N/A',
-            'panels': safe_int(row['Panels']),
-            'panel_size': safe_int(row['Panel Size']),
-            'panel_model': str(row['Panel Model']) if pd.notna(row['Panel Model']) else 'N/A',
-            'panel_vendor': str(row['Panel Vendor']) if pd.notna(row['Panel Vendor']) else 'N/A',
-            'panel_description': str(row['Panel_Description']) if pd.notna(row['Panel_Description']) else 'N/A',
-            'array_size_kwp': safe_float(row['Array_Size_kWp']),
-            'avg_load': safe_float(row['Avg Load']),
-            'province': row['Province_Full'],
-            'commissioned_date': site_commissioned_map.get(site_id, str(row['First_Production_Date']) if pd.notna(row['First_Production_Date']) else 'N/A'),
-            'daily_data': daily_data,
-            'prod_7d': safe_float(row['Prod_7d_kWh']),
-            'avg_daily_7d': safe_float(row['Avg_Daily_7d_kWh']),
-            'avg_yield_7d': safe_float(row['Avg_Yield_7d_kWh_kWp']),
-            'prod_30d': safe_float(row['Prod_30d_kWh']),
-            'avg_daily_30d': safe_float(row['Avg_Daily_30d_kWh']),
-            'avg_yield_30d': safe_float(row['Avg_Yield_30d_kWh_kWp']),
-            'prod_90d': safe_float(row['Prod_90d_kWh']),
-            'avg_daily_90d': safe_float(row['Avg_Daily_90d_kWh']),
-            'avg_yield_90d': safe_float(row['Avg_Yield_90d_kWh_kWp']),
-            'total_production': safe_float(row['Total_Production_kWh']),
-            'days_with_data': safe_int(row['Days_With_Data']),
-            'avg_daily_all': safe_float(row['Avg_Daily_Production_kWh']),
-            'avg_yield_all': safe_float(row['Avg_Specific_Yield_kWh_kWp_day']),
-            'first_production_date': str(row['First_Production_Date']) if pd.notna(row['First_Production_Date']) else 'N/A'
-        }
+            site_data[site_id] = {
+                'site_name': site_names[i],
+                'po': pos[i],
+                'project': projects[i],
+                'grid_access': grid_access[i],
+                'power_sources': power_sources[i],
+                'panels': panels[i],
+                'panel_size': panel_sizes[i],
+                'panel_model': panel_models[i],
+                'panel_vendor': panel_vendors[i],
+                'panel_description': panel_descriptions[i],
+                'array_size_kwp_str': f"{array_sizes_kwp[i]:.2f} kWp",
+                'avg_load_str': f"{avg_loads[i]:.1f} kW",
+                'province': provinces[i],
+                'commissioned_date': commissioned_dates[i],
+                'daily_data': daily_data
+            }
+    
+        # Intern repeated strings into lookup tables; sites carry integer indices
+        string_tables = {}
+        for field in ['province', 'project', 'panel_description', 'grid_access', 'power_sources', 'panel_vendor', 'panel_model']:
+            table = sorted(set(str(site[field]) for site in site_data.values()))
+            index = {name: i for i, name in enumerate(table)}
+            for site in site_data.values():
+                site[field] = index[str(site[field])]
+            string_tables[field] = table
+    
+        try:
+            cache_dir.mkdir(exist_ok=True)
+            # Keep only the current fingerprint; older inputs or script edits never hit again
+            for stale in cache_dir.glob("analysis.*.pkl"):
+                stale.unlink()
+            with open(cache_file, 'wb') as f:
+                pickle.dump((degradation_data, site_data, string_tables), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"  ⚠ Warning: Could not write analysis cache: {e}")
+    else:
+        degradation_data, site_data, string_tables = cached
+    
+    print(f"  ✓ Degradation analysis complete for {len(degradation_data)} sites")
+    
+    # Degradation categories as row indices into degradation_data: offline sites, then online sites
+    # by actual degradation (most degraded first; improvements most improved first)
+    has_recent = np.array([d['has_recent_data'] for d in degradation_data], dtype=bool)
+    actual = np.array([d['actual_degradation'] for d in degradation_data], dtype=np.float64)
+    most_degraded_first = np.argsort(-actual, kind='stable')
+    most_improved_first = np.argsort(actual, kind='stable')
+    
+    def degradation_bucket(mask, order):
+        return order[mask[order]].tolist()
+    
+    degradation_buckets = {
+        'offline': np.flatnonzero(~has_recent).tolist(),
+        'high-degradation': degradation_bucket(has_recent & (actual > 50), most_degraded_first),
+        'medium-degradation': degradation_bucket(has_recent & (actual >= 30) & (actual <= 50), most_degraded_first),
+        'low-degradation': degradation_bucket(has_recent & (actual >= 0) & (actual < 30), most_degraded_first),
+        'better-degradation': degradation_bucket(has_recent & (actual < 0), most_improved_first),
+    }
+    degradation_ids = {
+        category: [degradation_data[i]['site_id'] for i in rows]
+        for category, rows in degradation_buckets.items()
+    }
     
     # Calculate fleet statistics
     total_sites = len(df)
@@ -258,27 +310,37 @@ def generate_installed_sites_dashboard():
         avg_yield_90d = df['Avg_Yield_90d_kWh_kWp'].mean()
     
     # Calculate critical alerts (sites with 0 production in last 3 days)
-    last_3_days = date_cols_sorted[:3] if len(date_cols_sorted) >= 3 else date_cols_sorted
-    
-    critical_alerts = []
-    for idx, row in df.iterrows():
-        has_zero_production = all(pd.isna(row[date]) or row[date] == 0 for date in last_3_days)
-        if has_zero_production:
-            critical_alerts.append(row['Site_ID'])
+    no_recent_production = (np.isnan(recent_production) | (recent_production == 0)).all(axis=1)
+    critical_alerts = df.loc[no_recent_production, 'Site_ID'].tolist()
     
     # Categorize sites by performance
-    excellent_sites_df = df[df['Avg_Yield_30d_kWh_kWp'] > 4.5]
-    good_sites_df = df[(df['Avg_Yield_30d_kWh_kWp'] >= 3.5) & (df['Avg_Yield_30d_kWh_kWp'] <= 4.5)]
-    fair_sites_df = df[(df['Avg_Yield_30d_kWh_kWp'] >= 2.5) & (df['Avg_Yield_30d_kWh_kWp'] < 3.5)]
-    poor_sites_df = df[df['Avg_Yield_30d_kWh_kWp'] < 2.5]
+    yield_30d = df['Avg_Yield_30d_kWh_kWp']
+    performance_band = np.select(
+        [yield_30d > 4.5, yield_30d >= 3.5, yield_30d >= 2.5, yield_30d < 2.5],
+        ['excellent', 'good', 'fair', 'poor'],
+        default=''
+    )
+    
+    # (Site_ID, Site_Display_Name, Panel_Description, Array_Size_kWp, Avg_Yield_30d_kWh_kWp) tuples per band
+    site_rows = df[['Site_ID', 'Site_Display_Name', 'Panel_Description', 'Array_Size_kWp', 'Avg_Yield_30d_kWh_kWp']]
+    excellent_sites, good_sites, fair_sites, poor_sites = [
+        list(site_rows[performance_band == band].itertuples(index=False, name=None))
+        for band in ['excellent', 'good', 'fair', 'poor']
+    ]
     
-    excellent_sites = excellent_sites_df.to_dict('records')
-    good_sites = good_sites_df.to_dict('records')
-    fair_sites = fair_sites_df.to_dict('records')
-    poor_sites = poor_sites_df.to_dict('records')
+    # Site IDs as strings, stringified once and sliced per band for navigation
+    site_id_strings = df['Site_ID'].astype(str).to_numpy()
+    band_site_ids = {
+        band: site_id_strings[performance_band == band].tolist()
+        for band in ['excellent', 'good', 'fair', 'poor']
+    }
+    
+    # Low-cardinality grouping keys as categoricals so the groupbys below work on integer codes
+    for col in ['Province_Full', 'Project', 'Panel_Description', 'Grid Access', 'Power Sources']:
+        df[col] = df[col].astype('category')
     
     # Group by province
-    province_stats = df.groupby('Province_Full').agg({
+    province_stats = df.groupby('Province_Full', observed=True).agg({
         'Site_ID': 'count',
         'Array_Size_kWp': 'sum',
         'Avg_Yield_30d_kWh_kWp': 'mean'
@@ -287,7 +349,7 @@ def generate_installed_sites_dashboard():
     province_stats = province_stats.sort_values('avg_yield', ascending=False)
     
     # Group by project
-    project_stats = df.groupby('Project').agg({
+    project_stats = df.groupby('Project', observed=True).agg({
         'Site_ID': 'count',
         'Array_Size_kWp': 'sum',
         'Avg_Yield_30d_kWh_kWp': 'mean'
@@ -296,7 +358,7 @@ def generate_installed_sites_dashboard():
     project_stats = project_stats.sort_values('avg_yield', ascending=False)
     
     # Group by panel type
-    panel_stats = df.groupby('Panel_Description').agg({
+    panel_stats = df.groupby('Panel_Description', observed=True).agg({
         'Site_ID': 'count',
         'Array_Size_kWp': 'sum',
         'Avg_Yield_30d_kWh_kWp': 'mean'
@@ -305,13 +367,13 @@ def generate_installed_sites_dashboard():
     panel_stats = panel_stats.sort_values('avg_yield', ascending=False)
     
     # Group by Grid Access
-    grid_access_stats = df.groupby('Grid Access').agg({
+    grid_access_stats = df.groupby('Grid Access', observed=True).agg({
         'Site_ID': 'count'
     }).reset_index()
     grid_access_stats.columns = ['grid_access', 'site_count']
     
     # Group by Power Sources
-    power_sources_stats = df.groupby('Power Sources').agg({
+    power_sources_stats = df.groupby('Power Sources', observed=True).agg({
         'Site_ID': 'count'
     }).reset_index()
     power_sources_stats.columns = ['power_sources', 'site_count']
@@ -341,21 +403,52 @@ def generate_installed_sites_dashboard():
     print(f"\n[4/4] Generating HTML dashboard...")
     
     # Generate HTML for site list items (not cards)
-    def generate_site_list_item(site, color='blue', category='all'):
-        site_name = site_name_map.get(site['Site_ID'], site['Site'])
-        color_map = {'green': '#27ae60', 'blue': '#3498db', 'yellow': '#f39c12', 'red': '#e74c3c'}
-        return f'''<div class="site-list-item" onclick="openSiteModal('{site['Site_ID']}', '{category}')" style="cursor: pointer; padding: 0.75rem; border-left: 3px solid {color_map[color]}; margin-bottom: 0.5rem; background: #f8f9fa; border-radius: 0.5rem; transition: transform 0.2s;">
+    color_map = {'green': '#27ae60', 'blue': '#3498db', 'yellow': '#f39c12', 'red': '#e74c3c'}
+    
+    def generate_site_list_html(sites, color='blue', category='all'):
+        # Colour and category are baked into the template once per list; only the site fields vary per item
+        template = f'''<div class="site-list-item" data-site-id="{{0}}" data-cat="{category}" style="cursor: pointer; padding: 0.75rem; border-left: 3px solid {color_map[color]}; margin-bottom: 0.5rem; background: #f8f9fa; border-radius: 0.5rem; transition: transform 0.2s;">
             <div style="display: flex; justify-content: space-between; align-items: center;">
-                <div style="font-weight: 600;">{site_name}</div>
-                <div style="font-weight: bold; color: {color_map[color]};">{site['Avg_Yield_30d_kWh_kWp']:.2f} kWh/kWp/day</div>
+                <div style="font-weight: 600;">{{1}}</div>
+                <div style="font-weight: bold; color: {color_map[color]};">{{2:.2f}} kWh/kWp/day</div>
             </div>
-            <div style="font-size: 0.875rem; color: #6c757d; margin-top: 0.25rem;">{site['Panel_Description']} • {site['Array_Size_kWp']:.1f} kWp</div>
+            <div style="font-size: 0.875rem; color: #6c757d; margin-top: 0.25rem;">{{3}} • {{4:.1f}} kWp</div>
         </div>'''
+        return ''.join([
+            template.format(site_id, site_name, avg_yield_30d, panel_description, array_size)
+            for site_id, site_name, panel_description, array_size, avg_yield_30d in sites
+        ])
     
-    excellent_html = ''.join([generate_site_list_item(s, 'green', 'excellent') for s in excellent_sites])
-    good_html = ''.join([generate_site_list_item(s, 'blue', 'good') for s in good_sites])
-    fair_html = ''.join([generate_site_list_item(s, 'yellow', 'fair') for s in fair_sites])
-    poor_html = ''.join([generate_site_list_item(s, 'red', 'poor') for s in poor_sites])
+    excellent_html = generate_site_list_html(excellent_sites, 'green', 'excellent')
+    good_html = generate_site_list_html(good_sites, 'blue', 'good')
+    fair_html = generate_site_list_html(fair_sites, 'yellow', 'fair')
+    poor_html = generate_site_list_html(poor_sites, 'red', 'poor')
+    
+    def generate_degradation_list_html(category, color, empty_message='No sites in this category'):
+        if not degradation_data:
+            return ''
+        if not degradation_buckets[category]:
+            return f'<p style="color: #6c757d; padding: 1rem;">{empty_message}</p>'
+        # Fields are filled by name straight from each degradation_data entry
+        template = f'''<div class="site-list-item" data-site-id="{{site_id}}" data-cat="{category}" style="cursor: pointer; padding: 0.75rem; border-left: 3px solid {color_map[color]}; margin-bottom: 0.5rem; background: #f8f9fa; border-radius: 0.5rem; transition: transform 0.2s;">
+                <div style="display: flex; justify-content: space-between; align-items: center;">
+                    <div style="font-weight: 600;">{{site_name}}</div>
+                    <div style="font-weight: bold; color: {color_map[color]};">{{actual_degradation_str}}</div>
+                </div>
+                <div style="font-size: 0.875rem; color: #6c757d; margin-top: 0.25rem;">
+                    {{panel_description}} • {{array_size_str}} • {{years_elapsed_str}}
+                </div>
+                <div style="font-size: 0.75rem; color: #495057; margin-top: 0.25rem;">
+                    {{yield_95th_str}} | {{expected_degradation_str}} | {{performance_vs_expected_str}}
+                </div>
+            </div>'''
+        return ''.join([template.format_map(degradation_data[i]) for i in degradation_buckets[category]])
+    
+    offline_html = generate_degradation_list_html('offline', 'red', 'No offline sites detected')
+    high_degradation_html = generate_degradation_list_html('high-degradation', 'red')
+    medium_degradation_html = generate_degradation_list_html('medium-degradation', 'yellow')
+    low_degradation_html = generate_degradation_list_html('low-degradation', 'blue')
+    better_degradation_html = generate_degradation_list_html('better-degradation', 'green')
     
     # Generate province cards
     province_html = ''.join([
@@ -388,10 +481,14 @@ def generate_installed_sites_dashboard():
     ])
     
     # Get all site IDs for navigation
-    all_site_ids = [str(site_id) for site_id in df['Site_ID'].tolist()]
+    all_site_ids = site_id_strings.tolist()
     
-    # Write HTML file
-    html_content = f"""<!DOCTYPE html>
+    # Gzip + base64 the per-site payload; the browser inflates it with DecompressionStream
+    site_data_b64 = base64.b64encode(gzip.compress(orjson.dumps(site_data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))).decode('ascii')
+    
+    # Write HTML file: the page is split around the site payload, which is streamed in between
+    # rather than copied into one large string
+    html_head = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -580,22 +677,22 @@ def generate_installed_sites_dashboard():
             <div class="chart-container">
                 <h3>🌟 Excellent Performance Sites (>4.5 kWh/kWp/day) - {len(excellent_sites)} sites</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Click any site to view detailed performance summary</p>
-                <div style="max-height: 400px; overflow-y: auto;">{excellent_html}</div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;">{excellent_html}</div>
             </div>
             <div class="chart-container">
                 <h3>✅ Good Performance Sites (3.5-4.5 kWh/kWp/day) - {len(good_sites)} sites</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Click any site to view detailed performance summary</p>
-                <div style="max-height: 400px; overflow-y: auto;">{good_html}</div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;">{good_html}</div>
             </div>
             <div class="chart-container">
                 <h3>⚠️ Fair Performance Sites (2.5-3.5 kWh/kWp/day) - {len(fair_sites)} sites</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Click any site to view detailed performance summary</p>
-                <div style="max-height: 400px; overflow-y: auto;">{fair_html}</div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;">{fair_html}</div>
             </div>
             <div class="chart-container">
                 <h3>🚨 Poor Performance Sites (<2.5 kWh/kWp/day) - {len(poor_sites)} sites</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Click any site to view detailed performance summary</p>
-                <div style="max-height: 400px; overflow-y: auto;">{poor_html}</div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;">{poor_html}</div>
             </div>
         </div>
         
@@ -603,31 +700,31 @@ def generate_installed_sites_dashboard():
             <div class="chart-container">
                 <h3>🚨 Offline or No Data (Last 3 Days)</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Sites with no production data in the last 3 days - requires immediate attention</p>
-                <div style="max-height: 400px; overflow-y: auto;" id="offline-sites-list"></div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;" id="offline-sites-list">{offline_html}</div>
             </div>
             
             <div class="chart-container">
                 <h3>🔴 High Degradation (>50%)</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Sites showing severe degradation above 50% - requires immediate attention and investigation</p>
-                <div style="max-height: 400px; overflow-y: auto;" id="high-degradation-list"></div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;" id="high-degradation-list">{high_degradation_html}</div>
             </div>
             
             <div class="chart-container">
                 <h3>⚠️ Medium Degradation (30-50%)</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Sites showing moderate degradation between 30-50% - monitor closely and plan maintenance</p>
-                <div style="max-height: 400px; overflow-y: auto;" id="medium-degradation-list"></div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;" id="medium-degradation-list">{medium_degradation_html}</div>
             </div>
             
             <div class="chart-container">
                 <h3>✅ Low Degradation (0-30%)</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Sites with acceptable degradation levels between 0-30% - normal performance range</p>
-                <div style="max-height: 400px; overflow-y: auto;" id="low-degradation-list"></div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;" id="low-degradation-list">{low_degradation_html}</div>
             </div>
             
             <div class="chart-container">
                 <h3>🌟 Better Than Expected (Negative degradation)</h3>
                 <p style="font-size: 0.875rem; color: #6c757d; margin-bottom: 1rem;">Sites showing improvement over time - performing better than initial commissioning</p>
-                <div style="max-height: 400px; overflow-y: auto;" id="better-degradation-list"></div>
+                <div class="scroll-list" style="max-height: 400px; overflow-y: auto;" id="better-degradation-list">{better_degradation_html}</div>
             </div>
         </div>
         
@@ -682,25 +779,77 @@ def generate_installed_sites_dashboard():
     </div>
     
     <script>
-    const siteData = {json.dumps(site_data)};
+    const STRINGS = {json.dumps(string_tables)};
+    // Charts redraw on every site/period switch; skip the entry animations
+    Chart.defaults.animation = false;
+    
+    // One shared formatter for chart date labels (same output as toLocaleDateString(), without a locale lookup per call)
+    const dateFormat = new Intl.DateTimeFormat();
+    
+    const SITE_DATA_GZ = \""""
+    html_tail = f"""";
+    let siteData = null;
+    let siteDataError = null;
+    let pendingOpen = null;  // Latest site clicked while the payload is still decoding
+    
+    function decodeFloat32(b64) {{
+        const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+        return new Float32Array(bytes.buffer);
+    }}
+    
+    // Unpack a site's packed Float32 daily series the first time that site is opened
+    function siteSeries(site) {{
+        const data = site.daily_data;
+        if (typeof data.solar_supply_kwh === "string") {{
+            data.solar_supply_kwh = decodeFloat32(data.solar_supply_kwh);
+            data.specific_yield = decodeFloat32(data.specific_yield);
+        }}
+        return data;
+    }}
+    
+    // Inflate the gzipped site payload natively; series stay packed until needed.
+    // Fetching it as a data: URL lets the browser decode the base64 off the main thread,
+    // so script evaluation (and first paint) doesn't wait on the payload
+    const siteDataReady = fetch('data:application/octet-stream;base64,' + SITE_DATA_GZ)
+        .then(response => new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).json())
+        .then(data => {{
+            siteData = data;
+        }})
+        .catch(err => {{
+            // e.g. a browser without DecompressionStream; report it instead of leaving clicks dead
+            siteDataError = err;
+            console.error("Could not load site data:", err);
+        }});
     const allSiteIds = {json.dumps(all_site_ids)};
-    const degradationData = {json.dumps(degradation_df.to_dict('records') if len(degradation_df) > 0 else [])};
     const gridAccessData = {json.dumps(grid_access_stats.to_dict('records'))};
     const powerSourcesData = {json.dumps(power_sources_stats.to_dict('records'))};
     const commissioningData = {json.dumps(commissioning_timeline_data[['First_Production_Date', 'cumulative_count', 'count']].to_dict('records') if len(commissioning_timeline_data) > 0 else [])};
     
     // Site category lists for navigation
-    const excellentSiteIds = {json.dumps([str(site['Site_ID']) for site in excellent_sites])};
-    const goodSiteIds = {json.dumps([str(site['Site_ID']) for site in good_sites])};
-    const fairSiteIds = {json.dumps([str(site['Site_ID']) for site in fair_sites])};
-    const poorSiteIds = {json.dumps([str(site['Site_ID']) for site in poor_sites])};
+    const excellentSiteIds = {json.dumps(band_site_ids['excellent'])};
+    const goodSiteIds = {json.dumps(band_site_ids['good'])};
+    const fairSiteIds = {json.dumps(band_site_ids['fair'])};
+    const poorSiteIds = {json.dumps(band_site_ids['poor'])};
     
     // Degradation category lists for navigation
-    const offlineSiteIds = [];
-    const highDegradationIds = [];
-    const mediumDegradationIds = [];
-    const lowDegradationIds = [];
-    const betterDegradationIds = [];
+    const offlineSiteIds = {json.dumps(degradation_ids['offline'])};
+    const highDegradationIds = {json.dumps(degradation_ids['high-degradation'])};
+    const mediumDegradationIds = {json.dumps(degradation_ids['medium-degradation'])};
+    const lowDegradationIds = {json.dumps(degradation_ids['low-degradation'])};
+    const betterDegradationIds = {json.dumps(degradation_ids['better-degradation'])};
+    
+    // Category name -> navigation list
+    const CAT_LISTS = {{
+        'excellent': excellentSiteIds,
+        'good': goodSiteIds,
+        'fair': fairSiteIds,
+        'poor': poorSiteIds,
+        'offline': offlineSiteIds,
+        'high-degradation': highDegradationIds,
+        'medium-degradation': mediumDegradationIds,
+        'low-degradation': lowDegradationIds,
+        'better-degradation': betterDegradationIds
+    }};
     
     let currentSiteId = null;
     let currentSiteIndex = 0;
@@ -722,44 +871,53 @@ def generate_installed_sites_dashboard():
         button.textContent = document.body.classList.contains("dark-mode") ? "☀️ Light Mode" : "🌙 Dark Mode";
     }}
     
+    // Site id -> first position in a navigation list, built once per list on first use
+    const listPositions = new Map();
+    function positionInList(list, siteId) {{
+        let positions = listPositions.get(list);
+        if (!positions) {{
+            positions = new Map();
+            list.forEach((id, i) => {{ if (!positions.has(id)) positions.set(id, i); }});
+            listPositions.set(list, positions);
+        }}
+        return positions.has(siteId) ? positions.get(siteId) : -1;
+    }}
+    
+    function showSiteDataError() {{
+        document.getElementById("modal-site-name").textContent = "Site Details";
+        document.getElementById("modal-body").innerHTML = `
+            <div style="padding: 2rem; text-align: center;">
+                Site details could not be loaded in this browser.<br>
+                Please open the dashboard in a current version of Chrome, Edge, Firefox or Safari.
+            </div>
+        `;
+        document.getElementById("site-modal").classList.add("active");
+    }}
+    
     function openSiteModal(siteId, category) {{
+        if (siteDataError) {{
+            showSiteDataError();
+            return;
+        }}
+        if (!siteData) {{
+            // Only the latest click opens once the payload is ready (or shows the error if it fails)
+            if (!pendingOpen) {{
+                siteDataReady.then(() => {{
+                    const [id, cat] = pendingOpen;
+                    pendingOpen = null;
+                    openSiteModal(id, cat);
+                }});
+            }}
+            pendingOpen = [siteId, category];
+            return;
+        }}
         currentSiteId = siteId;
         currentCategory = category || 'all';
         
         // Set the appropriate site list based on category
-        switch(currentCategory) {{
-            case 'excellent':
-                currentSiteList = excellentSiteIds;
-                break;
-            case 'good':
-                currentSiteList = goodSiteIds;
-                break;
-            case 'fair':
-                currentSiteList = fairSiteIds;
-                break;
-            case 'poor':
-                currentSiteList = poorSiteIds;
-                break;
-            case 'offline':
-                currentSiteList = offlineSiteIds;
-                break;
-            case 'high-degradation':
-                currentSiteList = highDegradationIds;
-                break;
-            case 'medium-degradation':
-                currentSiteList = mediumDegradationIds;
-                break;
-            case 'low-degradation':
-                currentSiteList = lowDegradationIds;
-                break;
-            case 'better-degradation':
-                currentSiteList = betterDegradationIds;
-                break;
-            default:
-                currentSiteList = allSiteIds;
-        }}
+        currentSiteList = CAT_LISTS[currentCategory] || allSiteIds;
         
-        currentSiteIndex = currentSiteList.indexOf(siteId);
+        currentSiteIndex = positionInList(currentSiteList, siteId);
         
         const modal = document.getElementById("site-modal");
         const site = siteData[siteId];
@@ -769,6 +927,14 @@ def generate_installed_sites_dashboard():
             return;
         }}
         
+        // Lay the modal out but keep it invisible while it is filled, so the charts
+        // size against the real container once and the reveal is a single repaint
+        const wasOpen = modal.classList.contains("active");
+        if (!wasOpen) {{
+            modal.style.visibility = "hidden";
+            modal.classList.add("active");
+        }}
+        
         const prevDisabled = currentSiteIndex <= 0 ? 'disabled' : '';
         const nextDisabled = currentSiteIndex >= currentSiteList.length - 1 ? 'disabled' : '';
         const prevStyle = currentSiteIndex <= 0 ? 'opacity: 0.3; cursor: not-allowed;' : 'cursor: pointer;';
@@ -782,7 +948,7 @@ def generate_installed_sites_dashboard():
                 </div>
                 <div style="flex: 1; text-align: center; margin-left: 1rem;">
                     <div style="font-size: 0.95rem; font-weight: 600;">${{site.site_name}}</div>
-                    <div style="font-size: 0.75rem; opacity: 0.9; margin-top: 0.15rem;">${{site.panel_description}} • ${{site.project}}</div>
+                    <div style="font-size: 0.75rem; opacity: 0.9; margin-top: 0.15rem;">${{STRINGS.panel_description[site.panel_description]}} • ${{STRINGS.project[site.project]}}</div>
                 </div>
             </div>
         `;
@@ -794,10 +960,11 @@ def generate_installed_sites_dashboard():
         const buttonIndex = periodMap[currentPeriod] || 2;
         if (periodButtons[buttonIndex]) {{
             periodButtons[buttonIndex].classList.add("active");
-            loadSiteData(periodButtons[buttonIndex], currentPeriod);
+            // First open renders straight away (the modal is still hidden); navigation is debounced
+            loadSiteData(periodButtons[buttonIndex], currentPeriod, !wasOpen);
         }}
         
-        modal.classList.add("active");
+        if (!wasOpen) modal.style.visibility = "";
     }}
     
     function navigateSite(direction) {{
@@ -810,6 +977,7 @@ def generate_installed_sites_dashboard():
     }}
     
     function closeSiteModal() {{
+        clearTimeout(siteRenderTimer);
         document.getElementById("site-modal").classList.remove("active");
         if (siteCharts.length > 0) {{
             siteCharts.forEach(chart => chart.destroy());
@@ -817,56 +985,121 @@ def generate_installed_sites_dashboard():
         }}
     }}
     
-    function loadSiteData(button, period) {{
+    // Largest-Triangle-Three-Buckets: indices of ~threshold points preserving the visual shape
+    function lttb(values, threshold) {{
+        const n = values.length;
+        if (threshold >= n || threshold < 3) return Array.from({{length: n}}, (_, i) => i);
+        const keep = [0];
+        const bucketSize = (n - 2) / (threshold - 2);
+        let a = 0;
+        for (let b = 0; b < threshold - 2; b++) {{
+            const nextStart = Math.floor((b + 1) * bucketSize) + 1;
+            const nextEnd = Math.min(Math.floor((b + 2) * bucketSize) + 1, n);
+            let avgX = 0, avgY = 0;
+            for (let j = nextStart; j < nextEnd; j++) {{ avgX += j; avgY += values[j]; }}
+            avgX /= (nextEnd - nextStart);
+            avgY /= (nextEnd - nextStart);
+            
+            const start = Math.floor(b * bucketSize) + 1;
+            const end = nextStart;
+            let maxArea = -1, maxIdx = start;
+            for (let j = start; j < end; j++) {{
+                const area = Math.abs((a - avgX) * (values[j] - values[a]) - (a - j) * (avgY - values[a]));
+                if (area > maxArea) {{ maxArea = area; maxIdx = j; }}
+            }}
+            keep.push(maxIdx);
+            a = maxIdx;
+        }}
+        keep.push(n - 1);
+        return keep;
+    }}
+    
+    // Rapid prev/next or period clicks are coalesced into one chart rebuild after a short pause
+    const SITE_RENDER_DELAY_MS = 120;
+    let siteRenderTimer = null;
+    
+    function loadSiteData(button, period, immediate = false) {{
         currentPeriod = period;  // Save current period selection
         document.querySelectorAll(".period-button").forEach(btn => btn.classList.remove("active"));
         button.classList.add("active");
         
-        if (!currentSiteId) return;
+        clearTimeout(siteRenderTimer);
+        if (immediate) {{
+            renderSiteData();
+        }} else {{
+            siteRenderTimer = setTimeout(renderSiteData, SITE_RENDER_DELAY_MS);
+        }}
+    }}
+    
+    function renderSiteData() {{
+        const period = currentPeriod;
+        if (!currentSiteId || !siteData) return;
+        if (!document.getElementById("site-modal").classList.contains("active")) return;
         const site = siteData[currentSiteId];
         if (!site || !site.daily_data) return;
         
-        const data = site.daily_data;
-        let filteredData = data;
+        const data = siteSeries(site);
+        let start = 0;
         const now = new Date();
         const days = {{"7d": 7, "30d": 30, "90d": 90}};
         
         if (period !== "all") {{
             const cutoff = new Date(now - days[period] * 24 * 60 * 60 * 1000);
-            filteredData = data.filter(d => new Date(d.date) >= cutoff);
+            // Dates are ascending: binary-search the first one inside the window
+            let end = data.dates.length;
+            while (start < end) {{
+                const mid = (start + end) >> 1;
+                if (new Date(data.dates[mid]) < cutoff) start = mid + 1;
+                else end = mid;
+            }}
         }}
         
-        const validData = filteredData.filter(d => !isNaN(d.solar_supply_kwh) && !isNaN(d.specific_yield));
+        const dates = data.dates.slice(start);
+        const supply = data.solar_supply_kwh.subarray(start);
+        const yields = data.specific_yield.subarray(start);
         
-        const totalProd = validData.reduce((sum, d) => sum + (d.solar_supply_kwh || 0), 0);
-        const avgYield = validData.length > 0 ? validData.reduce((sum, d) => sum + (d.specific_yield || 0), 0) / validData.length : 0;
-        const maxProd = validData.length > 0 ? Math.max(...validData.map(d => d.solar_supply_kwh || 0)) : 0;
-        const minProd = validData.length > 0 ? Math.min(...validData.map(d => d.solar_supply_kwh || 0)) : 0;
+        let totalProd = 0, yieldSum = 0, maxProd = 0, minProd = 0;
+        for (let i = 0; i < supply.length; i++) {{
+            totalProd += supply[i];
+            yieldSum += yields[i];
+            if (i === 0 || supply[i] > maxProd) maxProd = supply[i];
+            if (i === 0 || supply[i] < minProd) minProd = supply[i];
+        }}
+        const avgYield = supply.length > 0 ? yieldSum / supply.length : 0;
+        
+        // Long histories are decimated with LTTB (picked on production) before charting
+        let chartDates = dates, chartSupply = supply, chartYields = yields;
+        if (period === "all" && supply.length > 800) {{
+            const keep = lttb(supply, 500);
+            chartDates = keep.map(i => dates[i]);
+            chartSupply = keep.map(i => supply[i]);
+            chartYields = keep.map(i => yields[i]);
+        }}
         
         document.getElementById("site-info-grid").innerHTML = `
             <div class="site-info-item">
                 <div class="site-info-label">Panel Type</div>
-                <div class="site-info-value">${{site.panel_description}}</div>
+                <div class="site-info-value">${{STRINGS.panel_description[site.panel_description]}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Array Size</div>
-                <div class="site-info-value">${{site.array_size_kwp.toFixed(2)}} kWp</div>
+                <div class="site-info-value">${{site.array_size_kwp_str}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Avg Load</div>
-                <div class="site-info-value">${{site.avg_load.toFixed(1)}} kW</div>
+                <div class="site-info-value">${{site.avg_load_str}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Grid Access</div>
-                <div class="site-info-value">${{site.grid_access}}</div>
+                <div class="site-info-value">${{STRINGS.grid_access[site.grid_access]}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Power Sources</div>
-                <div class="site-info-value">${{site.power_sources}}</div>
+                <div class="site-info-value">${{STRINGS.power_sources[site.power_sources]}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Project</div>
-                <div class="site-info-value">${{site.project}}</div>
+                <div class="site-info-value">${{STRINGS.project[site.project]}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">PO Number</div>
@@ -874,7 +1107,7 @@ def generate_installed_sites_dashboard():
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Province</div>
-                <div class="site-info-value">${{site.province}}</div>
+                <div class="site-info-value">${{STRINGS.province[site.province]}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Commissioning</div>
@@ -882,11 +1115,11 @@ def generate_installed_sites_dashboard():
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Panel Vendor</div>
-                <div class="site-info-value">${{site.panel_vendor}}</div>
+                <div class="site-info-value">${{STRINGS.panel_vendor[site.panel_vendor]}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Panel Model</div>
-                <div class="site-info-value">${{site.panel_model}}</div>
+                <div class="site-info-value">${{STRINGS.panel_model[site.panel_model]}}</div>
             </div>
             <div class="site-info-item">
                 <div class="site-info-label">Panels Count</div>
@@ -913,19 +1146,30 @@ def generate_installed_sites_dashboard():
             </div>
         `;
         
+        // Labels formatted once for both charts; points are pre-parsed {{x: label index, y}} so Chart.js skips parsing
+        const chartLabels = chartDates.map(d => dateFormat.format(new Date(d)));
+        const toPoints = values => Array.from(values, (y, x) => ({{x, y}}));
+        
+        // While the modal stays open the two charts are kept and only their data is swapped
         if (siteCharts.length > 0) {{
-            siteCharts.forEach(chart => chart.destroy());
-            siteCharts = [];
+            const [dailyChart, yieldChart] = siteCharts;
+            dailyChart.data.labels = chartLabels;
+            dailyChart.data.datasets[0].data = toPoints(chartSupply);
+            yieldChart.data.labels = chartLabels;
+            yieldChart.data.datasets[0].data = toPoints(chartYields);
+            dailyChart.update('none');
+            yieldChart.update('none');
+            return;
         }}
         
         const dailyCtx = document.getElementById("dailyProductionChart").getContext("2d");
         siteCharts.push(new Chart(dailyCtx, {{
             type: "line",
             data: {{
-                labels: validData.map(d => new Date(d.date).toLocaleDateString()),
+                labels: chartLabels,
                 datasets: [{{
                     label: "Production (kWh)",
-                    data: validData.map(d => d.solar_supply_kwh || 0),
+                    data: toPoints(chartSupply),
                     borderColor: "#3498db",
                     backgroundColor: "rgba(52, 152, 219, 0.1)",
                     fill: true,
@@ -934,6 +1178,8 @@ def generate_installed_sites_dashboard():
             }},
             options: {{
                 responsive: true,
+                parsing: false,
+                normalized: true,
                 scales: {{
                     y: {{ beginAtZero: true }}
                 }}
@@ -944,10 +1190,10 @@ def generate_installed_sites_dashboard():
         siteCharts.push(new Chart(yieldCtx, {{
             type: "line",
             data: {{
-                labels: validData.map(d => new Date(d.date).toLocaleDateString()),
+                labels: chartLabels,
                 datasets: [{{
                     label: "Specific Yield (kWh/kWp)",
-                    data: validData.map(d => d.specific_yield || 0),
+                    data: toPoints(chartYields),
                     borderColor: "#27ae60",
                     backgroundColor: "rgba(39, 174, 96, 0.1)",
                     fill: true,
@@ -956,6 +1202,8 @@ def generate_installed_sites_dashboard():
             }},
             options: {{
                 responsive: true,
+                parsing: false,
+                normalized: true,
                 scales: {{
                     y: {{ beginAtZero: true }}
                 }}
@@ -1032,7 +1280,7 @@ def generate_installed_sites_dashboard():
         new Chart(ctx, {{
             type: "line",
             data: {{
-                labels: commissioningData.map(d => new Date(d.First_Production_Date).toLocaleDateString()),
+                labels: commissioningData.map(d => dateFormat.format(new Date(d.First_Production_Date))),
                 datasets: [{{
                     label: "Cumulative Sites Commissioned",
                     data: commissioningData.map(d => d.cumulative_count),
@@ -1103,100 +1351,19 @@ def generate_installed_sites_dashboard():
         }});
     }}
     
-    // Initialize degradation lists
-    function initializeDegradationLists() {{
-        if (!degradationData || degradationData.length === 0) {{
-            return;
-        }}
-        
-        // Separate sites by category with new thresholds
-        const offlineSites = degradationData.filter(s => !s.has_recent_data);
-        const onlineSites = degradationData.filter(s => s.has_recent_data);
-        
-        // New degradation categories based on actual degradation percentage
-        const highDeg = onlineSites.filter(s => s.actual_degradation > 50).sort((a, b) => b.actual_degradation - a.actual_degradation);
-        const mediumDeg = onlineSites.filter(s => s.actual_degradation >= 30 && s.actual_degradation <= 50).sort((a, b) => b.actual_degradation - a.actual_degradation);
-        const lowDeg = onlineSites.filter(s => s.actual_degradation >= 0 && s.actual_degradation < 30).sort((a, b) => b.actual_degradation - a.actual_degradation);
-        const betterDeg = onlineSites.filter(s => s.actual_degradation < 0).sort((a, b) => a.actual_degradation - b.actual_degradation);
-        
-        // Generate HTML for each category
-        function generateDegradationItem(site, color, category) {{
-            const colorMap = {{'green': '#27ae60', 'blue': '#3498db', 'yellow': '#f39c12', 'red': '#e74c3c'}};
-            const degradationText = site.actual_degradation >= 0
-                ? `${{site.actual_degradation.toFixed(1)}}% degradation`
-                : `${{Math.abs(site.actual_degradation).toFixed(1)}}% improvement`;
-            const expectedText = `Expected: ${{site.expected_degradation.toFixed(1)}}%`;
-            const performanceText = site.performance_vs_expected >= 0
-                ? `${{site.performance_vs_expected.toFixed(1)}}% better than expected`
-                : `${{Math.abs(site.performance_vs_expected).toFixed(1)}}% worse than expected`;
-            
-            return `<div class="site-list-item" onclick="openSiteModal('${{site.site_id}}', '${{category}}')" style="cursor: pointer; padding: 0.75rem; border-left: 3px solid ${{colorMap[color]}}; margin-bottom: 0.5rem; background: #f8f9fa; border-radius: 0.5rem; transition: transform 0.2s;">
-                <div style="display: flex; justify-content: space-between; align-items: center;">
-                    <div style="font-weight: 600;">${{site.site_name}}</div>
-                    <div style="font-weight: bold; color: ${{colorMap[color]}};">${{degradationText}}</div>
-                </div>
-                <div style="font-size: 0.875rem; color: #6c757d; margin-top: 0.25rem;">
-                    ${{site.panel_description}} • ${{site.array_size.toFixed(1)}} kWp • ${{site.years_elapsed.toFixed(1)}} years old
-                </div>
-                <div style="font-size: 0.75rem; color: #495057; margin-top: 0.25rem;">
-                    Initial: ${{site.initial_yield_95th.toFixed(2)}} kWh/kWp → Latest: ${{site.latest_yield_95th.toFixed(2)}} kWh/kWp | ${{expectedText}} | ${{performanceText}}
-                </div>
-            </div>`;
-        }}
-        
-        // Populate site ID arrays for navigation
-        offlineSiteIds.length = 0;
-        offlineSiteIds.push(...offlineSites.map(s => s.site_id));
-        
-        highDegradationIds.length = 0;
-        highDegradationIds.push(...highDeg.map(s => s.site_id));
-        
-        mediumDegradationIds.length = 0;
-        mediumDegradationIds.push(...mediumDeg.map(s => s.site_id));
-        
-        lowDegradationIds.length = 0;
-        lowDegradationIds.push(...lowDeg.map(s => s.site_id));
-        
-        betterDegradationIds.length = 0;
-        betterDegradationIds.push(...betterDeg.map(s => s.site_id));
-        
-        // Populate offline sites
-        const offlineHtml = offlineSites.length > 0
-            ? offlineSites.map(s => generateDegradationItem(s, 'red', 'offline')).join('')
-            : '<p style="color: #6c757d; padding: 1rem;">No offline sites detected</p>';
-        document.getElementById('offline-sites-list').innerHTML = offlineHtml;
-        
-        // Populate high degradation
-        const highHtml = highDeg.length > 0
-            ? highDeg.map(s => generateDegradationItem(s, 'red', 'high-degradation')).join('')
-            : '<p style="color: #6c757d; padding: 1rem;">No sites in this category</p>';
-        document.getElementById('high-degradation-list').innerHTML = highHtml;
-        
-        // Populate medium degradation
-        const mediumHtml = mediumDeg.length > 0
-            ? mediumDeg.map(s => generateDegradationItem(s, 'yellow', 'medium-degradation')).join('')
-            : '<p style="color: #6c757d; padding: 1rem;">No sites in this category</p>';
-        document.getElementById('medium-degradation-list').innerHTML = mediumHtml;
-        
-        // Populate low degradation
-        const lowHtml = lowDeg.length > 0
-            ? lowDeg.map(s => generateDegradationItem(s, 'blue', 'low-degradation')).join('')
-            : '<p style="color: #6c757d; padding: 1rem;">No sites in this category</p>';
-        document.getElementById('low-degradation-list').innerHTML = lowHtml;
-        
-        // Populate better than expected
-        const betterHtml = betterDeg.length > 0
-            ? betterDeg.map(s => generateDegradationItem(s, 'green', 'better-degradation')).join('')
-            : '<p style="color: #6c757d; padding: 1rem;">No sites in this category</p>';
-        document.getElementById('better-degradation-list').innerHTML = betterHtml;
-    }}
-    
     // Initialize charts when page loads
     document.addEventListener("DOMContentLoaded", function() {{
         initializeGridAccessChart();
         initializePowerSourcesChart();
         initializeCommissioningChart();
-        initializeDegradationLists();
+        
+        // One delegated click handler per list instead of an inline onclick per row
+        document.querySelectorAll(".scroll-list").forEach(list => {{
+            list.addEventListener("click", e => {{
+                const row = e.target.closest(".site-list-item");
+                if (row) openSiteModal(row.dataset.siteId, row.dataset.cat);
+            }});
+        }});
     }});
     
     // Close modal on outside click
@@ -1211,7 +1378,9 @@ def generate_installed_sites_dashboard():
     
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            f.write(html_head)
+            f.write(site_data_b64)
+            f.write(html_tail)
         print(f"✓ Dashboard generated successfully!")
         print(f"  Output file: {output_file}")
         print(f"\n{'='*70}")
@@ -2,7 +2,10 @@ import os
 import json
 import io
 import shutil
+import asyncio
 from pathlib import Path
+import aiohttp
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
@@ -11,9 +14,14 @@ from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
 FOLDER_MONITORING = '1ZCVjpjqZ5rnLBhCTZf2yeQbEOX9zeYCm' # 01_Monitoring_Data
 FOLDER_ARCHIVES = '19AJmzhnlwXI78B0HTNX3mke8sMr-XK1G'   # 02_Archives
 FOLDER_OUTPUT = '1fqRaaM9Zw5NwWdSuc8OFRfiHTeemspK2'     # 03_Output (UPDATED)
+DOWNLOAD_CONCURRENCY = 5  # Simultaneous Drive downloads (kept low to stay under rateLimitExceeded)
+DOWNLOAD_CHUNK_SIZE = 16 * 1024 * 1024  # One request per 16 MB instead of the 100 KB default
+DOWNLOAD_RETRIES = 3  # Retries on rate limits, Drive 5xx responses and dropped connections
+BATCH_SIZE = 100  # Drive API limit on calls per batch request
+RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024  # Smaller files go up in one multipart request
 
 def authenticate():
-    """Authenticates using individual GitHub Secrets for User OAuth"""
+    """Authenticates using individual GitHub Secrets for User OAuth; returns (service, credentials)"""
     
     # Get secrets from environment variables
     client_id = os.environ.get('GDRIVE_CLIENT_ID')
@@ -27,7 +35,7 @@ def authenticate():
             with open('token.json', 'r') as token:
                 creds_data = json.load(token)
                 creds = Credentials.from_authorized_user_info(creds_data)
-            return build('drive', 'v3', credentials=creds)
+            return build('drive', 'v3', credentials=creds), creds
         else:
             raise ValueError("❌ Missing Environment Variables: GDRIVE_CLIENT_ID, GDRIVE_CLIENT_SECRET, or GDRIVE_REFRESH_TOKEN")
 
@@ -43,9 +51,55 @@ def authenticate():
         scopes=['https://www.googleapis.com/auth/drive']
     )
     
-    return build('drive', 'v3', credentials=creds)
+    return build('drive', 'v3', credentials=creds), creds
 
-def download_monitoring_data(service):
+async def _should_retry(response):
+    """True for Drive responses worth retrying: 429, 403 rate limits and 5xx"""
+    if response.status == 429 or response.status >= 500:
+        return True
+    if response.status == 403:
+        body = await response.text()
+        return 'rateLimitExceeded' in body or 'userRateLimitExceeded' in body
+    return False
+
+async def _download_file(session, sem, item):
+    """Stream one Drive file into monitoring_data/ over the shared aiohttp session"""
+    url = f"https://www.googleapis.com/drive/v3/files/{item['id']}?alt=media"
+    target = Path("monitoring_data") / item['name']
+    # Stream to a .part file and rename it on success, so a failed transfer never leaves a truncated .xlsx
+    partial = target.with_name(target.name + '.part')
+    async with sem:
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            try:
+                async with session.get(url) as response:
+                    if attempt < DOWNLOAD_RETRIES and await _should_retry(response):
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    response.raise_for_status()
+                    with open(partial, 'wb') as fh:
+                        async for chunk in response.content.iter_chunked(1024 * 1024):
+                            fh.write(chunk)
+                partial.replace(target)
+                return item
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # Dropped connection or stalled stream: back off and fetch the file again
+                if attempt == DOWNLOAD_RETRIES:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+            finally:
+                partial.unlink(missing_ok=True)
+
+async def _download_all(token, items):
+    """Download items concurrently, at most DOWNLOAD_CONCURRENCY at a time"""
+    sem = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+    headers = {'Authorization': f'Bearer {token}'}
+    connector = aiohttp.TCPConnector(limit=DOWNLOAD_CONCURRENCY * 2)
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+        return await asyncio.gather(*[_download_file(session, sem, item) for item in items], return_exceptions=True)
+
+def download_monitoring_data(service, creds):
     """Download new Excel files from Drive to local folder"""
     print("--- Checking Drive for new monitoring data ---")
     
@@ -62,17 +116,25 @@ def download_monitoring_data(service):
     if not items:
         print("No new files found in Drive.")
     
-    for item in items:
-        # Check for Excel files
-        if item['name'].endswith('.xlsx') or 'spreadsheet' in item['mimeType']:
-            print(f"Downloading: {item['name']}")
-            request = service.files().get_media(fileId=item['id'])
-            fh = io.FileIO(f"monitoring_data/{item['name']}", 'wb')
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                _, done = downloader.next_chunk()
-            downloaded.append(item)
+    # Check for Excel files
+    excel_items = [item for item in items if item['name'].endswith('.xlsx') or 'spreadsheet' in item['mimeType']]
+    
+    if excel_items:
+        # Refresh the OAuth token once up front; the async phase only carries the bearer header
+        if not creds.valid:
+            creds.refresh(Request())
+        results = asyncio.run(_download_all(creds.token, excel_items))
+        failed = []
+        for item, result in zip(excel_items, results):
+            if isinstance(result, Exception):
+                print(f"Error downloading {item['name']}: {result}")
+                failed.append(item['name'])
+            else:
+                downloaded.append(item)
+                print(f"Downloaded: {item['name']}")
+        if failed:
+            # Fail the run, as a download error always did, rather than processing an incomplete batch
+            raise RuntimeError(f"{len(failed)} of {len(excel_items)} monitoring files failed to download: {', '.join(failed)}")
     
     return downloaded
 
@@ -88,10 +150,10 @@ def download_history(service):
         print("Downloading history parquet...")
         request = service.files().get_media(fileId=items[0]['id'])
         fh = io.FileIO('monitoring_data_history.parquet', 'wb')
-        downloader = MediaIoBaseDownload(fh, request)
+        downloader = MediaIoBaseDownload(fh, request, chunksize=DOWNLOAD_CHUNK_SIZE)
         done = False
         while done is False:
-            _, done = downloader.next_chunk()
+            _, done = downloader.next_chunk(num_retries=DOWNLOAD_RETRIES)
         print("History restored.")
     else:
         print("No history file found (First run?).")
@@ -105,20 +167,29 @@ def sync_archives(service, downloaded_files):
         return
 
     archived_names = [f.name for f in local_archive_path.glob('*.xlsx')]
+    to_move = [f for f in downloaded_files if f['name'] in archived_names]
 
-    for drive_file in downloaded_files:
-        if drive_file['name'] in archived_names:
-            print(f"Moving {drive_file['name']} to Archive on Drive...")
-            try:
-                # Move file by changing parents
-                service.files().update(
-                    fileId=drive_file['id'],
-                    addParents=FOLDER_ARCHIVES,
-                    removeParents=FOLDER_MONITORING,
-                    fields='id, parents'
-                ).execute()
-            except Exception as e:
-                print(f"Error moving file on Drive: {e}")
+    def report(request_id, response, exception):
+        name = to_move[int(request_id)]['name']
+        if exception is not None:
+            print(f"Error moving {name} on Drive: {exception}")
+        else:
+            print(f"Moved {name} to Archive on Drive")
+
+    # Move files by changing parents, up to BATCH_SIZE moves per HTTP round trip
+    for start in range(0, len(to_move), BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=report)
+        for i, drive_file in enumerate(to_move[start:start + BATCH_SIZE], start):
+            batch.add(service.files().update(
+                fileId=drive_file['id'],
+                addParents=FOLDER_ARCHIVES,
+                removeParents=FOLDER_MONITORING,
+                fields='id, parents'
+            ), request_id=str(i))
+        try:
+            batch.execute()
+        except Exception as e:
+            print(f"Error moving files on Drive: {e}")
 
 def upload_outputs(service):
     """Upload Results to Master Folder"""
@@ -139,7 +210,8 @@ def upload_outputs(service):
         existing = results.get('files', [])
 
         file_metadata = {'name': local_file.name, 'parents': [FOLDER_OUTPUT]}
-        media = MediaFileUpload(str(local_file), resumable=True)
+        # Resumable sessions cost an extra round trip; only worth it for large files
+        media = MediaFileUpload(str(local_file), resumable=local_file.stat().st_size > RESUMABLE_UPLOAD_THRESHOLD)
 
         if existing:
             # Update existing file
@@ -162,11 +234,11 @@ if __name__ == "__main__":
     # Default to 'pre' if no argument provided
     step = sys.argv[1] if len(sys.argv) > 1 else "pre"
     
-    srv = authenticate()
+    srv, creds = authenticate()
     
     if step == "pre":
         download_history(srv)
-        files = download_monitoring_data(srv)
+        files = download_monitoring_data(srv, creds)
         # Save list of downloaded files to json to check later
         with open('downloaded_files.json', 'w') as f:
             json.dump(files, f)
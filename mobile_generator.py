@@ -1,11 +1,13 @@
 import json
 import os
 import shutil
+from contextlib import closing
 from pathlib import Path
 import pandas as pd
 from datetime import datetime, timedelta
 import sqlite3
 import numpy as np
+import orjson
 
 # --- CONFIGURATION ---
 OUTPUT_FOLDER = "mobile_build"
@@ -19,8 +21,20 @@ PROVINCE_MAPPING = {
     'ST': 'Stung Treng', 'MK': 'Mondulkiri', 'RK': 'Ratanakiri', 'PP': 'Phnom Penh', 'TK': 'Takeo'
 }
 
-def get_province_full_name(abbrev):
-    return PROVINCE_MAPPING.get(str(abbrev).upper(), str(abbrev))
+def percentile_95_rows(values, mask):
+    """95th percentile of the masked values in each row (NaN for empty rows), same interpolation as np.percentile"""
+    picked = np.sort(np.where(mask, values, np.nan), axis=1)  # NaNs sort to the end of each row
+    counts = mask.sum(axis=1)
+    virtual = (counts - 1) * 0.95
+    lower = np.floor(virtual).astype(np.intp)
+    upper = np.minimum(lower + 1, counts - 1)
+    rows = np.arange(len(picked))
+    a = picked[rows, np.maximum(lower, 0)]
+    b = picked[rows, np.maximum(upper, 0)]
+    gamma = virtual - lower
+    diff = b - a
+    result = np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+    return np.where(counts > 0, result, np.nan)
 
 def generate_mobile_site():
     print("="*70)
@@ -43,19 +57,29 @@ def generate_mobile_site():
     print(f"  Reading: {excel_file.name}")
     
     try:
-        df = pd.read_excel(excel_file, sheet_name='Installed Sites Production')
+        # Prefer the parquet copy written alongside the workbook, when it is at least as new
+        parquet_file = excel_file.with_suffix('.parquet')
+        if parquet_file.exists() and parquet_file.stat().st_mtime >= excel_file.stat().st_mtime:
+            # Missing text comes back as None; make it NaN like read_excel so labels still read 'nan'
+            df = pd.read_parquet(parquet_file).fillna(np.nan)
+        else:
+            df = pd.read_excel(excel_file, sheet_name='Installed Sites Production')
+            # Keep a parquet copy so the next run skips the Excel parse
+            try:
+                df.to_parquet(parquet_file, index=False, engine='pyarrow', compression='zstd')
+            except Exception as e:
+                print(f"  ⚠ Could not write parquet copy: {e}")
     except:
         return print("✗ Error reading Excel")
 
     # 3. Load DB Extra Info
-    site_db_info = {}
+    site_db_names = {}
     try:
         db_path = scripts_folder / "solar_performance.db"
         if db_path.exists():
-            conn = sqlite3.connect(db_path)
-            temp = pd.read_sql("SELECT site_id, site_name, commissioned_date FROM sites", conn)
-            conn.close()
-            site_db_info = temp.set_index('site_id').to_dict('index')
+            # Plain cursor rows straight into a dict; site_id is the table's primary key
+            with closing(sqlite3.connect(db_path)) as conn:
+                site_db_names = dict(conn.execute("SELECT site_id, site_name FROM sites").fetchall())
     except: pass
 
     # 4. Pre-process Columns
@@ -64,22 +88,56 @@ def generate_mobile_site():
         try: return type_func(val) if pd.notna(val) else default
         except: return default
 
-    df['Province_Full'] = df['Site_ID'].astype(str).str[:2].apply(get_province_full_name)
+    # Province: the 2-letter Site_ID prefix mapped to its full name, else the prefix as written
+    province_abbrev = df['Site_ID'].astype(str).str[:2]
+    df['Province_Full'] = province_abbrev.str.upper().map(PROVINCE_MAPPING).fillna(province_abbrev)
     date_cols = sorted([c for c in df.columns if isinstance(c, str) and len(c)==10 and c[4]=='-'], reverse=True)
-    col_to_date = {c: pd.to_datetime(c) for c in date_cols}
-    latest_date = col_to_date[date_cols[0]] if date_cols else datetime.now()
-
-    # 5. Global Stats Containers
+    # Column dates parsed once into a datetime64 array (newest first), not one Timestamp per column
+    dates = np.array(date_cols, dtype='datetime64[ns]')
+    latest_date = pd.Timestamp(dates[0]) if date_cols else datetime.now()
+
+    # 5. Per-site columns, computed once for the whole fleet
+    sizes = pd.to_numeric(df['Array_Size_kWp'], errors='coerce').fillna(0).to_numpy()
+    valid = sizes > 0  # sites without an array size are skipped entirely
+    yields = [round(v, 2) if pd.notna(v) else 0 for v in pd.to_numeric(df['Avg_Yield_30d_kWh_kWp'], errors='coerce').tolist()]
+    yld_arr = np.array(yields)
+    cats = np.select([yld_arr > 4.5, yld_arr >= 3.5, yld_arr >= 2.5], ['Excellent', 'Good', 'Fair'], 'Poor')
+
+    # Daily production as one (site x date) matrix, newest date first; row-major, since the
+    # degradation windows and the histories below all read it one site at a time
+    production = df[date_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    producing = production > 0
+
+    # Online = any production in the 3 most recent days
+    online = producing[:, :3].any(axis=1)
+
+    # Degradation: 95th percentile of the first month vs the last month, for every site at once
+    first_dates = pd.to_datetime(df['First_Production_Date'], errors='coerce', format='mixed')
+    first_np = first_dates.to_numpy(dtype='datetime64[ns]')[:, None]
+    comm_end_np = (first_dates + pd.DateOffset(months=1)).to_numpy(dtype='datetime64[ns]')[:, None]
+    last_start = latest_date - pd.DateOffset(months=1)
+    commission_mask = (dates >= first_np) & (dates <= comm_end_np) & producing
+    latest_mask = (dates >= np.datetime64(last_start, 'ns')) & (dates <= np.datetime64(latest_date, 'ns')) & producing
+    with np.errstate(invalid='ignore', divide='ignore'):
+        init_95 = percentile_95_rows(production, commission_mask) / sizes
+        curr_95 = percentile_95_rows(production, latest_mask) / sizes
+        years = (latest_date - first_dates).dt.days.to_numpy(dtype=np.float64, na_value=np.nan) / 365.25
+        expected = np.where(years <= 1, years * 3, 3 + (years - 1) * 0.7)
+        actual = np.where(init_95 > 0, (init_95 - curr_95) / init_95 * 100, 0)
+    has_deg = valid & online & commission_mask.any(axis=1) & latest_mask.any(axis=1)
+    deg_cats = np.select([actual > 50, actual >= 30, actual >= 0], ['High', 'Medium', 'Low'], 'Better')
+
+    # 6. Global Stats Containers
     site_metadata = {}
     
     # Aggregators
     fleet_stats = {
         'total_sites': len(df),
-        'online_sites': 0,
+        'online_sites': int(np.count_nonzero(valid & online)),
         'capacity': df['Array_Size_kWp'].sum(),
         'avg_yield_30d': df['Avg_Yield_30d_kWh_kWp'].mean(),
-        'critical_alerts': 0,
-        'perf_dist': {'Excellent':0, 'Good':0, 'Fair':0, 'Poor':0}
+        'critical_alerts': int(np.count_nonzero(valid & ~online)),
+        'perf_dist': {cat: int(np.count_nonzero(valid & (cats == cat))) for cat in ['Excellent', 'Good', 'Fair', 'Poor']}
     }
     
     chart_data = {
@@ -97,10 +155,18 @@ def generate_mobile_site():
 
     print(f"  Processing {len(df)} sites...")
 
-    for _, row in df.iterrows():
+    # Plain dict rows of the metadata columns; iterrows would build a Series for every site,
+    # and the daily readings are sliced straight out of the production matrix instead
+    rows = df.drop(columns=date_cols).to_dict('records')
+    date_labels = np.array(date_cols, dtype=object)
+    has_reading = ~np.isnan(production)
+    sizes, cats, online = sizes.tolist(), cats.tolist(), online.tolist()
+    has_deg, deg_cats = has_deg.tolist(), deg_cats.tolist()
+    years, expected, actual = years.tolist(), expected.tolist(), actual.tolist()
+    for i, row in enumerate(rows):
+        if not valid[i]: continue
         sid = str(row['Site_ID'])
-        size = safe_get(row, 'Array_Size_kWp')
-        if size <= 0: continue
+        size = sizes[i]
 
         # Panel Logic
         panel_desc = str(row.get('Panel_Description', ''))
@@ -112,10 +178,10 @@ def generate_mobile_site():
         # Basic Info
         meta = {
             'id': sid,
-            'name': site_db_info.get(sid, {}).get('site_name', str(row.get('Site', sid))),
+            'name': site_db_names.get(sid, str(row.get('Site', sid))),
             'prov': row['Province_Full'],
             'kwp': round(size, 2),
-            'yld': round(safe_get(row, 'Avg_Yield_30d_kWh_kWp'), 2),
+            'yld': yields[i],
             'panel': panel_desc,
             'proj': str(row.get('Project', 'N/A')),
             'grid': str(row.get('Grid Access', 'N/A')),
@@ -124,92 +190,56 @@ def generate_mobile_site():
             'deg_cat': 'Unknown',
             'deg_act': 0,
             'deg_exp': 0,
-            'online': False,
-            'years': 0
+            'online': online[i],
+            'years': 0,
+            'cat': cats[i],
+            'days': int(np.count_nonzero(has_reading[i]))
         }
         
-        # Performance Category
-        if meta['yld'] > 4.5: cat = 'Excellent'
-        elif meta['yld'] >= 3.5: cat = 'Good'
-        elif meta['yld'] >= 2.5: cat = 'Fair'
-        else: cat = 'Poor'
-        meta['cat'] = cat
-        fleet_stats['perf_dist'][cat] += 1
-
-        # Check Offline
-        recent_cols = date_cols[:3] if len(date_cols) >= 3 else date_cols
-        is_online = any(safe_get(row, d) > 0 for d in recent_cols)
-        meta['online'] = is_online
-        
-        if is_online: 
-            fleet_stats['online_sites'] += 1
-        else: 
-            fleet_stats['critical_alerts'] += 1
+        if not online[i]:
             meta['deg_cat'] = 'Offline'
 
         # Degradation Logic
-        if is_online and pd.notna(row['First_Production_Date']):
-            try:
-                first_date = pd.to_datetime(row['First_Production_Date'])
-                comm_end = first_date + pd.DateOffset(months=1)
-                last_start = latest_date - pd.DateOffset(months=1)
-                
-                def get_vals(start, end):
-                    cols = [c for c in date_cols if start <= col_to_date[c] <= end]
-                    return [row[c] for c in cols if pd.notna(row[c]) and row[c] > 0]
-
-                c_vals = get_vals(first_date, comm_end)
-                l_vals = get_vals(last_start, latest_date)
-
-                if c_vals and l_vals:
-                    init_95 = np.percentile(c_vals, 95) / size
-                    curr_95 = np.percentile(l_vals, 95) / size
-                    years = (latest_date - first_date).days / 365.25
-                    meta['years'] = round(years, 1)
-                    
-                    if years <= 1: expected = years * 3
-                    else: expected = 3 + (years - 1) * 0.7
-                        
-                    actual = ((init_95 - curr_95) / init_95 * 100) if init_95 > 0 else 0
-                    
-                    meta['deg_act'] = round(actual, 1)
-                    meta['deg_exp'] = round(expected, 1)
-                    
-                    if actual > 50: meta['deg_cat'] = 'High'
-                    elif actual >= 30: meta['deg_cat'] = 'Medium'
-                    elif actual >= 0: meta['deg_cat'] = 'Low'
-                    else: meta['deg_cat'] = 'Better'
-            except: pass
+        if has_deg[i]:
+            meta['years'] = round(years[i], 1)
+            meta['deg_act'] = round(actual[i], 1)
+            meta['deg_exp'] = round(expected[i], 1)
+            meta['deg_cat'] = deg_cats[i]
 
         site_metadata[sid] = meta
 
-        # JSON Data Export
-        daily_hist = []
-        for d in date_cols:
-            if pd.notna(row[d]):
-                val = float(row[d])
-                daily_hist.append({'d': d, 'v': val, 'y': round(val/size, 2) if size else 0})
-        
-        daily_hist = daily_hist[:365] 
-        with open(data_dir / f"{sid}.json", 'w') as f:
-            json.dump({'meta': meta, 'hist': daily_hist}, f)
-
-    # 6. Aggregates
-    provinces = df.groupby('Province_Full')['Avg_Yield_30d_kWh_kWp'].mean().to_dict()
-    projects = df.groupby('Project')['Avg_Yield_30d_kWh_kWp'].mean().to_dict()
-    panels = df.groupby('Panel_Description')['Avg_Yield_30d_kWh_kWp'].mean().to_dict()
+        # JSON Data Export: {'hist': [[date, kWh, kWh/kWp], ...]}, newest first; the metadata
+        # already ships in the page. Sites without a single reading get no file, the page skips the fetch
+        if not meta['days']: continue
+        hist_cols = np.flatnonzero(has_reading[i])[:365]
+        vals = production[i, hist_cols]
+        daily_hist = [
+            [d, v, round(y, 2)]
+            for d, v, y in zip(date_labels[hist_cols].tolist(), vals.tolist(), (vals / size).tolist())
+        ]
+        with open(data_dir / f"{sid}.json", 'wb') as f:
+            f.write(orjson.dumps({'hist': daily_hist}))
+
+    # 7. Aggregates
+    # Low-cardinality grouping keys as categoricals so the groupbys work on integer codes
+    for col in ['Province_Full', 'Project', 'Panel_Description']:
+        df[col] = df[col].astype('category')
+    provinces = df.groupby('Province_Full', observed=True)['Avg_Yield_30d_kWh_kWp'].mean().to_dict()
+    projects = df.groupby('Project', observed=True)['Avg_Yield_30d_kWh_kWp'].mean().to_dict()
+    panels = df.groupby('Panel_Description', observed=True)['Avg_Yield_30d_kWh_kWp'].mean().to_dict()
     
-    # 7. Generate HTML
+    # 8. Generate HTML
     print("  Generating Mobile HTML...")
     
-    json_metadata = json.dumps(site_metadata)
+    # orjson for the large per-site payload (written out as bytes below); the small aggregates
+    # stay on json.dumps, which keeps empty-group means as NaN literals (orjson would turn them into null)
     json_charts = json.dumps(chart_data)
     json_provs = json.dumps(provinces)
     json_projs = json.dumps(projects)
     json_panels = json.dumps(panels)
     json_dist = json.dumps(fleet_stats['perf_dist'])
     
-    html = f"""<!DOCTYPE html>
+    html_head = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -386,8 +416,12 @@ def generate_mobile_site():
     </div>
 </div>
 
+<script id="sites-json" type="application/json">"""
+    html_tail = f"""</script>
 <script>
-    const sites = {json_metadata};
+    // The site metadata is embedded as JSON data rather than a JS object literal; JSON.parse is
+    // much cheaper to run than compiling a ~0.5 MB literal. The small aggregates stay inline.
+    const sites = JSON.parse(document.getElementById('sites-json').textContent);
     const charts = {json_charts};
     const provs = {json_provs};
     const projs = {json_projs};
@@ -396,9 +430,23 @@ def generate_mobile_site():
     
     const $ = id => document.getElementById(id);
     const siteArr = Object.values(sites);
+    const catClass = {{Excellent: 'exc', Good: 'good', Fair: 'fair', Poor: 'poor'}};
+    
+    // Per-site list card and lowercased search text, built once instead of on every keystroke
+    siteArr.forEach(s => {{
+        const c = catClass[s.cat];
+        s._q = [s.name, s.id, s.prov, s.panel].join('\\n').toLowerCase();
+        s._card = `<div class="site-item c-${{c}}" onclick="openModal('${{s.id}}')">
+                <div class="badg bg-${{c}}">${{s.yld.toFixed(2)}}</div>
+                <b>${{s.name}}</b>
+                <div style="font-size:0.85rem; opacity:0.7; margin-top:4px">${{s.prov}} • ${{s.kwp}} kWp • ${{s.panel}}</div>
+            </div>`;
+    }});
     let myChart1, myChart2;
     let currentFilter = 'All';
     let currentSearch = '';
+    let lastMatches = null;  // sites matching lastQuery; a query containing it can only match a subset
+    let lastQuery = '';
 
     function init() {{
         renderSites('');
@@ -430,14 +478,11 @@ def generate_mobile_site():
 
     function renderSites(q) {{
         currentSearch = q.toLowerCase();
-        let html = '';
         
-        let fil = siteArr.filter(s => 
-            s.name.toLowerCase().includes(currentSearch) || 
-            s.id.toLowerCase().includes(currentSearch) || 
-            s.prov.toLowerCase().includes(currentSearch) ||
-            s.panel.toLowerCase().includes(currentSearch)
-        );
+        const pool = lastMatches && currentSearch.includes(lastQuery) ? lastMatches : siteArr;
+        let fil = pool.filter(s => s._q.includes(currentSearch));
+        lastMatches = fil;
+        lastQuery = currentSearch;
 
         if(currentFilter !== 'All') {{
             fil = fil.filter(s => s.cat === currentFilter);
@@ -447,14 +492,7 @@ def generate_mobile_site():
         const totalFound = fil.length;
         fil = fil.slice(0, displayLimit);
         
-        fil.forEach(s => {{
-            const c = s.cat === 'Excellent' ? 'exc' : (s.cat === 'Good' ? 'good' : (s.cat === 'Fair' ? 'fair' : 'poor'));
-            html += `<div class="site-item c-${{c}}" onclick="openModal('${{s.id}}')">
-                <div class="badg bg-${{c}}">${{s.yld.toFixed(2)}}</div>
-                <b>${{s.name}}</b>
-                <div style="font-size:0.85rem; opacity:0.7; margin-top:4px">${{s.prov}} • ${{s.kwp}} kWp • ${{s.panel}}</div>
-            </div>`;
-        }});
+        let html = fil.map(s => s._card).join('');
         
         if(totalFound > displayLimit) html += `<div style="text-align:center; padding:1rem; color:var(--blue)">+ ${{totalFound - displayLimit}} more sites (use search)</div>`;
         
@@ -539,16 +577,18 @@ def generate_mobile_site():
         ctx1.fillText("Loading data...", 10, 50);
 
         try {{
-            const res = await fetch(`site_data/${{id}}.json`);
-            if(!res.ok) throw new Error("Data not found");
-            const data = await res.json();
-            const hist = data.hist.slice(-90);
+            let hist = [];
+            if(s.days) {{
+                const res = await fetch(`site_data/${{id}}.json`);
+                if(!res.ok) throw new Error("Data not found");
+                hist = (await res.json()).hist.slice(-90);
+            }}
 
             myChart1 = new Chart($('m-chart'), {{
                 type: 'bar',
                 data: {{
-                    labels: hist.map(x => x.d.slice(5)),
-                    datasets: [{{ label:'Prod (kWh)', data:hist.map(x=>x.v), backgroundColor:'#3498db' }}]
+                    labels: hist.map(x => x[0].slice(5)),
+                    datasets: [{{ label:'Prod (kWh)', data:hist.map(x=>x[1]), backgroundColor:'#3498db' }}]
                 }},
                 options: {{ maintainAspectRatio: false, plugins: {{ legend: {{ display: false }} }} }}
             }});
@@ -556,9 +596,9 @@ def generate_mobile_site():
             myChart2 = new Chart($('m-yield-chart'), {{
                 type: 'line',
                 data: {{
-                    labels: hist.map(x => x.d.slice(5)),
+                    labels: hist.map(x => x[0].slice(5)),
                     datasets: [{{ 
-                        label:'Yield', data:hist.map(x=>x.y), 
+                        label:'Yield', data:hist.map(x=>x[2]), 
                         borderColor:'#27ae60', tension:0.3, pointRadius:1, 
                         fill: true, backgroundColor: 'rgba(39, 174, 96, 0.1)'
                     }}]
@@ -616,8 +656,12 @@ def generate_mobile_site():
 </body>
 </html>"""
 
-    with open(output_dir / "index.html", "w", encoding='utf-8') as f:
-        f.write(html)
+    # Write the page around the site metadata, which goes straight from orjson to disk
+    # rather than being decoded and copied into one large string
+    with open(output_dir / "index.html", "wb") as f:
+        f.write(html_head.encode('utf-8'))
+        f.write(orjson.dumps(site_metadata).replace(b'</', b'<\\/'))  # keep a '</script' in a name from closing the tag
+        f.write(html_tail.encode('utf-8'))
 
     print("✓ Optimized Mobile Dashboard Created!")
 
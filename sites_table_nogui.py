@@ -5,6 +5,12 @@ from pathlib import Path
 from datetime import datetime
 import numpy as np
 import shutil
+import openpyxl
+from pandas.api.types import union_categoricals
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+READ_WORKERS = os.cpu_count() or 1  # Processes used to parse monitoring exports
 
 # Add this block after "import shutil" and before "def load_historical_data"
 
@@ -13,6 +19,7 @@ def check_and_install_requirements():
     required = {
         'pandas': 'pandas',
         'openpyxl': 'openpyxl', 
+        'xlsxwriter': 'xlsxwriter',
         'pyarrow': 'pyarrow',
         'numpy': 'numpy'
     }
@@ -49,12 +56,36 @@ def check_and_install_requirements():
     
     return True
 
+def cached_read_excel(path, **kwargs):
+    """Read an Excel file through a pickle sidecar in .cache/, keyed by the file's mtime and size"""
+    path = Path(path)
+    cache_dir = path.parent / ".cache"
+    stat = path.stat()
+    cache_file = cache_dir / f"{path.name}.{stat.st_mtime_ns}.{stat.st_size}.pkl"
+    if cache_file.exists():
+        try:
+            return pd.read_pickle(cache_file)
+        except Exception as e:
+            print(f"  ⚠ Could not read cache for {path.name}: {e}")
+    
+    df = pd.read_excel(path, **kwargs)
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        # Drop sidecars left behind by earlier versions of the file
+        for stale in cache_dir.glob(f"{path.name}.*.pkl"):
+            stale.unlink()
+        df.to_pickle(cache_file)
+    except Exception as e:
+        print(f"  ⚠ Could not write cache for {path.name}: {e}")
+    return df
+
 def load_historical_data(history_file):
     """Load historical data from parquet file"""
     if history_file.exists():
         print(f"  ✓ Loading historical data from: {history_file.name}")
         try:
-            df = pd.read_parquet(history_file)
+            # Project to the three columns the merge uses; anything else in the file is never decoded
+            df = pd.read_parquet(history_file, columns=['Site_ID', 'Date', 'Solar_kWh'], engine='pyarrow')
             print(f"  ✓ Loaded {len(df):,} historical records")
             return df
         except Exception as e:
@@ -67,7 +98,11 @@ def load_historical_data(history_file):
 def save_historical_data(df, history_file):
     """Save combined data to parquet file for future use"""
     try:
-        df.to_parquet(history_file, index=False, compression='snappy')
+        # Large row groups compress better; Site_ID repeats for every day so it is dictionary-encoded
+        df.to_parquet(history_file, index=False, engine='pyarrow',
+                      compression='zstd', compression_level=1,
+                      row_group_size=1_000_000, data_page_size=1024 * 1024,
+                      use_dictionary=['Site_ID'], write_statistics=True)
         print(f"  ✓ Historical data saved to: {history_file.name}")
         return True
     except Exception as e:
@@ -109,12 +144,101 @@ def move_files_to_archive(xlsx_files, archive_folder):
     print(f"\n  ✓ Archive complete: {moved_count} moved, {failed_count} failed")
     return moved_count, failed_count
 
+def monitoring_column_role(col):
+    """Classify a monitoring export column as 'site', 'date', 'solar' or None"""
+    c_low = str(col).strip().lower()
+    # strict match for site to avoid 'Site ID' unless 'Site' is missing
+    if c_low == 'site':
+        return 'site'
+    if c_low == 'date':
+        return 'date'
+    if 'solar' in c_low and 'supply' in c_low:
+        return 'solar'
+    return None
+
+def find_header_row(file, max_rows=30):
+    """Return the 0-based index of the row holding 'Solar Supply (kWh)', scanning with openpyxl read-only"""
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]  # The sheet pd.read_excel reads by default
+        for i, row in enumerate(ws.iter_rows(max_row=max_rows, values_only=True)):
+            if any(val is not None and "Solar Supply (kWh)" in str(val) for val in row):
+                return i
+        return None
+    finally:
+        wb.close()
+
+def read_monitoring_file(file):
+    """Read one monitoring export; returns (Site_ID/Date/Solar_kWh frame or None, log lines)"""
+    messages = []
+    try:
+        # 1. Scan first 30 rows to find the specific column header
+        header_row_idx = find_header_row(file)
+        if header_row_idx is not None:
+            messages.append(f"      ✓ Found headers at Row {header_row_idx+1} (Index {header_row_idx})")
+        
+        # If not found, force try Row 21 (Index 20)
+        if header_row_idx is None:
+            messages.append("      ⚠ Auto-detect failed. Forcing Row 21...")
+            header_row_idx = 20
+        
+        # 2. Load only the Site/Date/Solar columns using the found index
+        df = pd.read_excel(file, header=header_row_idx, engine='openpyxl', dtype_backend='pyarrow',
+                           usecols=lambda col: monitoring_column_role(col) is not None)
+        
+        # Clean column names (strip whitespace like "Site " -> "Site")
+        df.columns = df.columns.astype(str).str.strip()
+        
+        # 3. Flexible Column Matching
+        # We look for columns that *contain* the key words, case-insensitive
+        col_site = None
+        col_date = None
+        col_solar = None
+        
+        for col in df.columns:
+            role = monitoring_column_role(col)
+            if role == 'site':
+                col_site = col
+            elif role == 'date':
+                col_date = col
+            elif role == 'solar':
+                col_solar = col
+        
+        # Print what we found
+        messages.append(f"      Columns detected: Site='{col_site}', Date='{col_date}', Solar='{col_solar}'")
+        
+        if col_site and col_date and col_solar:
+            # Rename and process
+            df_subset = df[[col_site, col_date, col_solar]].copy()
+            df_subset.columns = ['Site_ID', 'Date', 'Solar_kWh']
+            
+            # Standardize data (Arrow-backed columns, so strip/parse run in C)
+            df_subset['Site_ID'] = df_subset['Site_ID'].astype('string[pyarrow]').str.strip()
+            df_subset['Date'] = pd.to_datetime(df_subset['Date'], errors='coerce')
+            df_subset['Solar_kWh'] = pd.to_numeric(df_subset['Solar_kWh'], errors='coerce')
+            
+            # Drop invalid rows
+            df_subset = df_subset.dropna(subset=['Site_ID', 'Date'])
+            
+            if len(df_subset) > 0:
+                messages.append(f"      ✓ Loaded {len(df_subset)} valid records")
+                return df_subset, messages
+            messages.append("      ⚠ File loaded but contained 0 valid data rows")
+        else:
+            messages.append("      ✗ Missing specific columns. Expected: Site, Date, Solar Supply (kWh)")
+            messages.append(f"      Available columns: {list(df.columns)}")
+
+    except Exception as e:
+        messages.append(f"      ✗ Error processing file: {e}")
+    return None, messages
+
 def load_monitoring_data(monitoring_folder, historical_df=None, archive_folder=None):
     """Load monitoring data from Excel files and merge with historical data"""
     print("\n[2/5] Loading monitoring data from Excel files...")
     
     folder = Path(monitoring_folder)
-    xlsx_files = [f for f in folder.glob("*.xlsx") if not f.name.startswith("~$")]
+    # Name order, so "later files win" in the dedupe below does not depend on filesystem order
+    xlsx_files = sorted(f for f in folder.glob("*.xlsx") if not f.name.startswith("~$"))
     
     if not xlsx_files:
         print("  ⚠ No new Excel files found in monitoring folder")
@@ -127,79 +251,20 @@ def load_monitoring_data(monitoring_folder, historical_df=None, archive_folder=N
     all_data = []
     successfully_read_files = []
     
-    for file in xlsx_files:
-        try:
-            print(f"    Reading: {file.name}...")
-        
-            # 1. Scan first 30 rows to find the specific column header
-            df_scan = pd.read_excel(file, nrows=30, header=None)
-            
-            header_row_idx = None
-            for i, row in df_scan.iterrows():
-                # Convert row to string for searching
-                row_str = " ".join([str(val) for val in row.values])
-                
-                # We look for the specific unique column name from your screenshot
-                if "Solar Supply (kWh)" in row_str:
-                    header_row_idx = i
-                    print(f"      ✓ Found headers at Row {i+1} (Index {i})")
-                    break
-            
-            # If not found, force try Row 21 (Index 20)
-            if header_row_idx is None:
-                print("      ⚠ Auto-detect failed. Forcing Row 21...")
-                header_row_idx = 20
-            
-            # 2. Load the data using the found index
-            df = pd.read_excel(file, header=header_row_idx)
-            
-            # Clean column names (strip whitespace like "Site " -> "Site")
-            df.columns = df.columns.astype(str).str.strip()
-            
-            # 3. Flexible Column Matching
-            # We look for columns that *contain* the key words, case-insensitive
-            col_site = None
-            col_date = None
-            col_solar = None
-            
-            for col in df.columns:
-                c_low = col.lower()
-                # strict match for site to avoid 'Site ID' unless 'Site' is missing
-                if c_low == 'site': 
-                    col_site = col
-                elif c_low == 'date':
-                    col_date = col
-                elif 'solar' in c_low and 'supply' in c_low:
-                    col_solar = col
-            
-            # Print what we found
-            print(f"      Columns detected: Site='{col_site}', Date='{col_date}', Solar='{col_solar}'")
-            
-            if col_site and col_date and col_solar:
-                # Rename and process
-                df_subset = df[[col_site, col_date, col_solar]].copy()
-                df_subset.columns = ['Site_ID', 'Date', 'Solar_kWh']
-                
-                # Standardize data
-                df_subset['Site_ID'] = df_subset['Site_ID'].astype(str).str.strip()
-                df_subset['Date'] = pd.to_datetime(df_subset['Date'], errors='coerce')
-                df_subset['Solar_kWh'] = pd.to_numeric(df_subset['Solar_kWh'], errors='coerce')
-                
-                # Drop invalid rows
-                df_subset = df_subset.dropna(subset=['Date'])
-                
-                if len(df_subset) > 0:
-                    all_data.append(df_subset)
-                    successfully_read_files.append(file)
-                    print(f"      ✓ Loaded {len(df_subset)} valid records")
-                else:
-                    print("      ⚠ File loaded but contained 0 valid data rows")
-            else:
-                print("      ✗ Missing specific columns. Expected: Site, Date, Solar Supply (kWh)")
-                print(f"      Available columns: {list(df.columns)}")
-
-        except Exception as e:
-            print(f"      ✗ Error processing file: {e}")
+    # Parse the workbooks in parallel (openpyxl is CPU-bound); results and logs come back in file order
+    if len(xlsx_files) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(xlsx_files), READ_WORKERS)) as executor:
+            results = list(executor.map(read_monitoring_file, xlsx_files))
+    else:
+        results = [read_monitoring_file(file) for file in xlsx_files]
+    
+    for file, (df_subset, messages) in zip(xlsx_files, results):
+        print(f"    Reading: {file.name}...")
+        for message in messages:
+            print(message)
+        if df_subset is not None:
+            all_data.append(df_subset)
+            successfully_read_files.append(file)
 
     # Process results as before
     if not all_data:
@@ -208,15 +273,27 @@ def load_monitoring_data(monitoring_folder, historical_df=None, archive_folder=N
         
     # Combine
     new_data_df = pd.concat(all_data, ignore_index=True)
+    # Back to the schema of the history parquet; Site_ID repeats for every day, so it is a category
+    # and the dedupe, pivot and lookups below hash integer codes instead of strings
+    new_data_df = new_data_df.astype({'Site_ID': object, 'Solar_kWh': 'float64'}).astype({'Site_ID': 'category'})
+    
+    # Deduplicate: later files win within the new batch, and the new batch wins over history
+    new_data_df = new_data_df.drop_duplicates(subset=['Site_ID', 'Date'], keep='last')
     
     if historical_df is not None:
+        # One shared category set, so the key match and the concat stay categorical
+        historical_df = historical_df.astype({'Site_ID': 'category'})
+        sites = union_categoricals([historical_df['Site_ID'], new_data_df['Site_ID']], ignore_order=True).categories
+        site_dtype = pd.CategoricalDtype(sites.sort_values())
+        historical_df = historical_df.astype({'Site_ID': site_dtype})
+        new_data_df = new_data_df.astype({'Site_ID': site_dtype})
+        new_keys = pd.MultiIndex.from_frame(new_data_df[['Site_ID', 'Date']])
+        history_keys = pd.MultiIndex.from_frame(historical_df[['Site_ID', 'Date']])
+        historical_df = historical_df[~history_keys.isin(new_keys)]
         combined_df = pd.concat([historical_df, new_data_df], ignore_index=True)
     else:
         combined_df = new_data_df
         
-    # Deduplicate
-    combined_df = combined_df.sort_values('Date').drop_duplicates(subset=['Site_ID', 'Date'], keep='last')
-    
     # Archive
     if archive_folder and successfully_read_files:
         move_files_to_archive(successfully_read_files, archive_folder)
@@ -260,42 +337,23 @@ def build_installed_sites_table(monitoring_folder, metadata_file, output_file=No
     # Step 1: Load site metadata
     print("\n[1/5] Loading installed sites metadata...")
     try:
-        metadata_df = pd.read_excel(metadata_file)
+        metadata_df = cached_read_excel(metadata_file)
         print(f"  ✓ Loaded {len(metadata_df)} sites from metadata file")
         
         # Clean the Split column to use as Site_ID
         metadata_df['Site_ID'] = metadata_df['Split'].str.strip()
         
         # Calculate Array Size from Panels and Panel Size (handle NA values)
-        def calculate_array_size(row):
-            try:
-                panels = pd.to_numeric(row['Panels'], errors='coerce')
-                panel_size = pd.to_numeric(row['Panel Size'], errors='coerce')
-                if pd.notna(panels) and pd.notna(panel_size) and panels > 0 and panel_size > 0:
-                    return (panels * panel_size) / 1000
-                return 0
-            except:
-                return 0
-        
-        metadata_df['Array_Size_kWp'] = metadata_df.apply(calculate_array_size, axis=1)
+        panels = pd.to_numeric(metadata_df['Panels'], errors='coerce')
+        panel_size = pd.to_numeric(metadata_df['Panel Size'], errors='coerce')
+        valid_size = (panels > 0) & (panel_size > 0)
+        metadata_df['Array_Size_kWp'] = (panels * panel_size / 1000).where(valid_size, 0)
         
         # Create Panel Description (combination of size, vendor, and model)
-        def create_panel_description(row):
-            try:
-                panel_size = pd.to_numeric(row['Panel Size'], errors='coerce')
-                if pd.notna(panel_size) and panel_size > 0:
-                    size_str = str(int(panel_size))
-                else:
-                    size_str = "Unknown"
-                
-                vendor = str(row['Panel Vendor']) if pd.notna(row['Panel Vendor']) else "Unknown"
-                model = str(row['Panel Model']) if pd.notna(row['Panel Model']) else "Unknown"
-                
-                return f"{size_str} {vendor} {model}"
-            except:
-                return "Unknown Panel"
-        
-        metadata_df['Panel_Description'] = metadata_df.apply(create_panel_description, axis=1)
+        size_str = np.trunc(panel_size).where(panel_size > 0).astype('Int64').astype('string').fillna("Unknown")
+        vendor = metadata_df['Panel Vendor'].astype('string').fillna("Unknown")
+        model = metadata_df['Panel Model'].astype('string').fillna("Unknown")
+        metadata_df['Panel_Description'] = (size_str + " " + vendor + " " + model).astype(object)
         
         # Keep essential metadata columns
         metadata_cols = ['Site_ID', 'Site', 'Split', 'PO', 'Project', 'Grid Access', 
@@ -319,7 +377,7 @@ def build_installed_sites_table(monitoring_folder, metadata_file, output_file=No
     if combined_df is None or len(combined_df) == 0:
         print("\n  ✗ No valid data available")
         return False
-    
+
     # Save updated historical data
     print("\n  Updating historical data file...")
     save_historical_data(combined_df, history_file)
@@ -356,69 +414,62 @@ def build_installed_sites_table(monitoring_folder, metadata_file, output_file=No
     date_col_names = [col for col in final_df.columns if col not in metadata_cols]
     
     if date_col_names:
+        # Aggregate straight from the long (site, date, value) records instead of the wide matrix
+        site_codes, site_uniques = pd.factorize(final_df['Site_ID'])
+        readings = combined_df.dropna(subset=['Solar_kWh'])
+        obs_site = site_uniques.get_indexer(readings['Site_ID'])
+        in_table = obs_site >= 0
+        obs_site = obs_site[in_table]
+        obs_value = readings['Solar_kWh'].to_numpy(dtype=np.float64)[in_table]
+        obs_date = readings['Date'].to_numpy(dtype='datetime64[D]')[in_table]
+        
+        # One spare slot at the end: rows whose Site_ID is missing (code -1) read it as "no data"
+        n_slots = len(site_uniques) + 1
+        
+        def window_stats(mask):
+            total = np.bincount(obs_site[mask], weights=obs_value[mask], minlength=n_slots)
+            count = np.bincount(obs_site[mask], minlength=n_slots)
+            with np.errstate(invalid='ignore'):
+                mean = total / count
+            return total[site_codes], count[site_codes], mean[site_codes]
+        
+        array_size = final_df['Array_Size_kWp'].to_numpy(dtype=np.float64)
+        
+        def specific_yield(avg_daily):
+            with np.errstate(invalid='ignore'):
+                return np.where(array_size > 0, avg_daily / array_size, np.nan)
+        
         # Get current date for time-based calculations
         latest_date = pd.to_datetime(date_col_names[-1])
         
         # Calculate for different time periods
-        date_7d = (latest_date - pd.Timedelta(days=7)).strftime('%Y-%m-%d')
-        date_30d = (latest_date - pd.Timedelta(days=30)).strftime('%Y-%m-%d')
-        date_90d = (latest_date - pd.Timedelta(days=90)).strftime('%Y-%m-%d')
-        
-        # Get columns for each period
-        cols_7d = [col for col in date_col_names if col >= date_7d]
-        cols_30d = [col for col in date_col_names if col >= date_30d]
-        cols_90d = [col for col in date_col_names if col >= date_90d]
-        
-        # 7-day statistics
-        final_df['Prod_7d_kWh'] = final_df[cols_7d].sum(axis=1)
-        final_df['Avg_Daily_7d_kWh'] = final_df[cols_7d].mean(axis=1, skipna=True)
-        final_df['Avg_Yield_7d_kWh_kWp'] = final_df.apply(
-            lambda row: row['Avg_Daily_7d_kWh'] / row['Array_Size_kWp']
-            if pd.notna(row['Array_Size_kWp']) and row['Array_Size_kWp'] > 0
-            else None,
-            axis=1
-        )
-        
-        # 30-day statistics
-        final_df['Prod_30d_kWh'] = final_df[cols_30d].sum(axis=1)
-        final_df['Avg_Daily_30d_kWh'] = final_df[cols_30d].mean(axis=1, skipna=True)
-        final_df['Avg_Yield_30d_kWh_kWp'] = final_df.apply(
-            lambda row: row['Avg_Daily_30d_kWh'] / row['Array_Size_kWp']
-            if pd.notna(row['Array_Size_kWp']) and row['Array_Size_kWp'] > 0
-            else None,
-            axis=1
-        )
-        
-        # 90-day statistics
-        final_df['Prod_90d_kWh'] = final_df[cols_90d].sum(axis=1)
-        final_df['Avg_Daily_90d_kWh'] = final_df[cols_90d].mean(axis=1, skipna=True)
-        final_df['Avg_Yield_90d_kWh_kWp'] = final_df.apply(
-            lambda row: row['Avg_Daily_90d_kWh'] / row['Array_Size_kWp']
-            if pd.notna(row['Array_Size_kWp']) and row['Array_Size_kWp'] > 0
-            else None,
-            axis=1
-        )
+        for days, prod_col, avg_col, yield_col in [
+            (7, 'Prod_7d_kWh', 'Avg_Daily_7d_kWh', 'Avg_Yield_7d_kWh_kWp'),
+            (30, 'Prod_30d_kWh', 'Avg_Daily_30d_kWh', 'Avg_Yield_30d_kWh_kWp'),
+            (90, 'Prod_90d_kWh', 'Avg_Daily_90d_kWh', 'Avg_Yield_90d_kWh_kWp'),
+        ]:
+            cutoff = (latest_date - pd.Timedelta(days=days)).to_datetime64().astype('datetime64[D]')
+            total, _, mean = window_stats(obs_date >= cutoff)
+            final_df[prod_col] = total
+            final_df[avg_col] = mean
+            final_df[yield_col] = specific_yield(mean)
         
         # All-time statistics
-        final_df['Total_Production_kWh'] = final_df[date_col_names].sum(axis=1)
-        final_df['Days_With_Data'] = final_df[date_col_names].notna().sum(axis=1)
-        final_df['Avg_Daily_Production_kWh'] = final_df[date_col_names].mean(axis=1, skipna=True)
-        final_df['Avg_Specific_Yield_kWh_kWp_day'] = final_df.apply(
-            lambda row: row['Avg_Daily_Production_kWh'] / row['Array_Size_kWp']
-            if pd.notna(row['Array_Size_kWp']) and row['Array_Size_kWp'] > 0
-            else None,
-            axis=1
-        )
-        
-        # First production date
-        def get_first_production_date(row):
-            for col in date_col_names:
-                val = row[col]
-                if pd.notna(val) and val > 0:
-                    return col
-            return None
+        total, count, mean = window_stats(np.ones(len(obs_site), dtype=bool))
+        final_df['Total_Production_kWh'] = total
+        final_df['Days_With_Data'] = count
+        final_df['Avg_Daily_Production_kWh'] = mean
+        final_df['Avg_Specific_Yield_kWh_kWp_day'] = specific_yield(mean)
         
-        final_df['First_Production_Date'] = final_df.apply(get_first_production_date, axis=1)
+        # First production date: earliest positive reading per site
+        positive = obs_value > 0
+        no_date = np.iinfo(np.int64).max
+        first_day = np.full(n_slots, no_date, dtype=np.int64)
+        np.minimum.at(first_day, obs_site[positive], obs_date[positive].astype(np.int64))
+        first_day = first_day[site_codes]
+        has_first = first_day != no_date
+        first_str = np.datetime_as_string(np.where(has_first, first_day, 0).astype('datetime64[D]'))
+        final_df['First_Production_Date'] = np.where(has_first, first_str.astype(object), None)
     
     # Reorder columns
     summary_cols = ['Prod_7d_kWh', 'Avg_Daily_7d_kWh', 'Avg_Yield_7d_kWh_kWp',
@@ -436,24 +487,32 @@ def build_installed_sites_table(monitoring_folder, metadata_file, output_file=No
     print(f"  Output file: {output_file}")
     
     try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        # xlsxwriter streams the XML out far faster than openpyxl builds it for the wide date block.
+        # constant_memory stays off: pandas writes cells column by column, which that mode drops.
+        with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
             final_df.to_excel(writer, sheet_name='Installed Sites Production', index=False)
             
             worksheet = writer.sheets['Installed Sites Production']
             
             # Auto-adjust column widths
-            for idx, col in enumerate(metadata_cols + existing_summary_cols, 1):
+            for idx, col in enumerate(metadata_cols + existing_summary_cols):
                 max_length = max(
                     final_df[col].astype(str).apply(len).max(),
                     len(col)
                 ) + 2
-                worksheet.column_dimensions[worksheet.cell(1, idx).column_letter].width = min(max_length, 25)
+                worksheet.set_column(idx, idx, min(max_length, 25))
             
-            # Freeze panes
-            worksheet.freeze_panes = 'N2'
+            # Freeze panes (header row and columns A:M, i.e. at N2)
+            worksheet.freeze_panes(1, 13)
         
         print(f"  ✓ File saved successfully!")
         
+        # Columnar copy of the same sheet for the dashboard generator; parsing the wide xlsx back is slow
+        try:
+            final_df.to_parquet(output_file.with_suffix('.parquet'), index=False, engine='pyarrow', compression='zstd')
+        except Exception as e:
+            print(f"  ⚠ Could not write parquet copy: {e}")
+        
         # Print summary
         print("\n" + "="*70)
         print("SUMMARY")